@@ -1,3 +1,38 @@
+"""Flood risk prediction tool.
+
+The geodetic functions of `geo` only need NumPy and are imported eagerly.
+The names from `tool` and `live`, which need pandas and SciPy, are imported
+on first use, so that short-lived processes which only need `geo` start quickly.
+"""
+from importlib import import_module
+
+from . import geo
 from .geo import *
-from .tool import *
-from .live import *
+
+_LAZY_MODULES = ('tool', 'live')
+
+# Submodule of each lazily imported name, matching the submodule's `__all__`
+
+_LAZY_NAMES = {'Tool': 'tool',
+               'get_archive_day': 'live',
+               'historic_range': 'live',
+               'WarningRules': 'live',
+               'WarningPoller': 'live',
+               'interpolate_rainfall': 'live',
+               'RainfallBuffer': 'live',
+               'detect_events': 'live',
+               'ReadingCube': 'live'}
+
+__all__ = geo.__all__ + list(_LAZY_NAMES)
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return import_module('.'+name, __name__)
+    if name in _LAZY_NAMES:
+        value = getattr(import_module('.'+_LAZY_NAMES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r"%(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_LAZY_MODULES))
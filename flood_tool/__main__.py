@@ -0,0 +1,203 @@
+"""Score files of postcodes from the command line.
+
+Reads postcodes from csv or newline delimited files (or standard input)
+and writes the flood probability band, flood cost and annual flood risk of
+each, processing the input in chunks.
+
+Example::
+
+    python -m flood_tool --cache tool.pkl -j 4 postcodes.csv > scores.csv
+"""
+import argparse
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+RESOURCES = os.sep.join((os.path.dirname(__file__), 'resources'))
+
+# Record layout of binary output
+RECORD_DTYPE = np.dtype([('postcode', 'U7'), ('band', 'i1'),
+                         ('cost', 'f8'), ('risk', 'f8')])
+
+_tool = None
+
+def read_postcodes(stream):
+    """Generate postcodes from a csv or newline delimited text stream.
+
+    If the first line has a `Postcode` column, only that column is read,
+    otherwise every comma separated field is taken to be a postcode.
+    """
+    column = None
+    for lineno, row in enumerate(csv.reader(stream)):
+        if lineno == 0:
+            headings = [field.strip().lower() for field in row]
+            if 'postcode' in headings:
+                column = headings.index('postcode')
+                continue
+        fields = row if column is None else row[column:column+1]
+        for field in fields:
+            field = field.strip()
+            if field:
+                yield field
+
+def chunks(iterable, size):
+    """Generate lists of up to `size` items from an iterable."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+def load_tool(postcode_file, risk_file, values_file, cache=None):
+    """Load a `Tool`, from `cache` if it was written by this version from
+    the same input files, (re)writing it otherwise."""
+    from .tool import Tool, file_digest
+
+    if cache:
+        digests = [file_digest(filename)
+                   for filename in (postcode_file, risk_file, values_file)]
+        try:
+            return Tool.load(cache, digests)
+        except (OSError, ValueError):
+            pass
+    tool = Tool(postcode_file, risk_file, values_file)
+    if cache:
+        tool.save(cache, digests)
+    return tool
+
+def _init_worker(*args):
+    global _tool
+    _tool = load_tool(*args)
+
+def score_chunk(postcodes, tool=None):
+    """Get the band code, flood cost and annual flood risk of postcodes.
+
+    Parameters
+    ----------
+
+    postcodes: sequence of strs
+        Postcodes in any common format.
+    tool: Tool, optional
+        Tool to use. Defaults to the tool loaded for a worker process.
+
+    Returns
+    -------
+
+    numpy.ndarray
+        Records of `RECORD_DTYPE`. Invalid postcodes have band code -1 and
+        `numpy.nan` cost and risk.
+    """
+    from .tool import normalize_postcodes
+
+    tool = tool or _tool
+    postcodes = normalize_postcodes(postcodes)
+    out = np.empty(len(postcodes), dtype=RECORD_DTYPE)
+    out['postcode'] = postcodes
+    out['band'], out['cost'], out['risk'] = tool.get_postcode_scores(postcodes)
+
+    return out
+
+def score_postcodes(postcodes, tool_args, workers=1, chunksize=10000):
+    """Generate score records for chunks of postcodes, in input order.
+
+    Parameters
+    ----------
+
+    postcodes: iterable of strs
+        Postcodes to score.
+    tool_args: tuple
+        Arguments of `load_tool` for the tool to use.
+    workers: int, optional
+        Number of worker processes, or 1 to score in this process.
+    chunksize: int, optional
+        Number of postcodes scored per call.
+    """
+    if workers <= 1:
+        tool = load_tool(*tool_args)
+        for chunk in chunks(postcodes, chunksize):
+            yield score_chunk(chunk, tool)
+        return
+
+    # keep a bounded number of chunks in flight, so input is streamed
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=tool_args) as pool:
+        pending = deque()
+        for chunk in chunks(postcodes, chunksize):
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= 2*workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def write_csv(records, stream):
+    """Write score records as csv."""
+    from .tool import BANDS
+
+    writer = csv.writer(stream, lineterminator='\n')
+    writer.writerow(['Postcode', 'Probability Band', 'Flood Cost', 'Flood Risk'])
+    for chunk in records:
+        bands = np.where(chunk['band'] >= 0, BANDS[chunk['band']], '')
+        writer.writerows(zip(chunk['postcode'], bands,
+                             chunk['cost'].tolist(), chunk['risk'].tolist()))
+
+def write_binary(records, stream):
+    """Write score records as raw `RECORD_DTYPE` data."""
+    for chunk in records:
+        stream.write(chunk.tobytes())
+
+def main(argv=None):
+    """Run the command line interface."""
+    parser = argparse.ArgumentParser(prog='python -m flood_tool',
+                                     description=__doc__.split('\n\n')[0])
+
+    parser.add_argument("inputs", nargs="*", default=['-'],
+                        help="postcode files, or - for standard input")
+    parser.add_argument("-o", "--outfile", dest="outfile", default='-')
+    parser.add_argument("-f", "--format", dest="format", default='csv',
+                        choices=('csv', 'binary'))
+    parser.add_argument("-j", "--workers", dest="workers", type=int, default=1)
+    parser.add_argument("-c", "--chunksize", dest="chunksize", type=int,
+                        default=10000)
+    parser.add_argument("--cache", dest="cache", default='',
+                        help="preprocessed Tool data, written if missing")
+    parser.add_argument("--postcode-file", dest="postcode_file",
+                        default=os.sep.join((RESOURCES, 'postcodes.csv')))
+    parser.add_argument("--risk-file", dest="risk_file",
+                        default=os.sep.join((RESOURCES, 'flood_probability.csv')))
+    parser.add_argument("--values-file", dest="values_file",
+                        default=os.sep.join((RESOURCES, 'property_value.csv')))
+
+    args = parser.parse_args(argv)
+
+    tool_args = (args.postcode_file, args.risk_file, args.values_file,
+                 args.cache or None)
+    if args.cache and args.workers > 1:
+        # build the cache once, rather than in every worker
+        load_tool(*tool_args)
+
+    def postcodes():
+        for name in args.inputs:
+            if name == '-':
+                yield from read_postcodes(sys.stdin)
+            else:
+                with open(name, newline='') as infile:
+                    yield from read_postcodes(infile)
+
+    records = score_postcodes(postcodes(), tool_args, args.workers,
+                              args.chunksize)
+
+    binary = args.format == 'binary'
+    if args.outfile == '-':
+        out = sys.stdout.buffer if binary else sys.stdout
+        (write_binary if binary else write_csv)(records, out)
+    else:
+        with open(args.outfile, 'wb' if binary else 'w', newline=None if binary else '') as out:
+            (write_binary if binary else write_csv)(records, out)
+
+if __name__ == '__main__':
+    main()
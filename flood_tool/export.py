@@ -0,0 +1,133 @@
+"""Bulk export of postcode results as binary columns.
+
+Results are written column by column from chunks of arrays, as
+
+``.npz``
+    An uncompressed numpy archive of one ``.npy`` member per column.
+``.parquet``
+    An Apache Parquet file, if `pyarrow` is installed.
+any other path
+    A directory of one ``.npy`` file per column, which `read_results` maps
+    into memory rather than reading.
+
+None of these need parsing to read back.
+"""
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+__all__ = ['RESULT_COLUMNS', 'write_results', 'read_results']
+
+# Columns of a result set, with their types
+
+RESULT_COLUMNS = {'postcode': np.dtype('U7'),
+                  'band': np.dtype(np.int8),
+                  'cost': np.dtype(np.float64),
+                  'risk': np.dtype(np.float64),
+                  'rank': np.dtype(np.int64)}
+
+def result_format(path):
+    """Get the export format implied by a path: `'npz'`, `'parquet'` or `'npy'`."""
+    extension = os.path.splitext(str(path))[1].lower()
+    return {'.npz': 'npz', '.parquet': 'parquet'}.get(extension, 'npy')
+
+def _write_npy(path, chunks, length):
+    os.makedirs(path, exist_ok=True)
+    columns = {name: np.lib.format.open_memmap(os.path.join(path, name+'.npy'), 'w+',
+                                               dtype, (length,))
+               for name, dtype in RESULT_COLUMNS.items()}
+    start = 0
+    for chunk in chunks:
+        size = len(chunk['postcode'])
+        for name, column in columns.items():
+            column[start:start+size] = chunk[name]
+        start += size
+    for column in columns.values():
+        column.flush()
+
+def _write_npz(path, chunks, length):
+    # stream the columns to memory mapped files first, as zip members can
+    # only be written one at a time
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        _write_npy(tmp, chunks, length)
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name in RESULT_COLUMNS:
+                archive.write(os.path.join(tmp, name+'.npy'), name+'.npy')
+
+def _write_parquet(path, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ImportError('writing .parquet results requires pyarrow') from err
+
+    schema = pa.schema([(name, pa.string() if dtype.kind == 'U' else pa.from_numpy_dtype(dtype))
+                        for name, dtype in RESULT_COLUMNS.items()])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_batch(pa.record_batch([pa.array(np.asarray(chunk[name]), field.type)
+                                                for name, field in zip(RESULT_COLUMNS, schema)],
+                                               schema=schema))
+
+def write_results(path, chunks, length, format=None):
+    """Write a result set from chunks of columns.
+
+    Parameters
+    ----------
+
+    path: str
+        File or directory to write.
+    chunks: iterable of dicts
+        Chunks of the result set, each a dictionary of equal length arrays
+        keyed as in `RESULT_COLUMNS`.
+    length: int
+        Total number of results over all chunks.
+    format: str, optional
+        One of `'npz'`, `'npy'` or `'parquet'`. By default this is implied
+        by the extension of `path`.
+    """
+    format = format or result_format(path)
+    if format == 'npz':
+        _write_npz(path, chunks, length)
+    elif format == 'npy':
+        _write_npy(path, chunks, length)
+    elif format == 'parquet':
+        _write_parquet(path, chunks)
+    else:
+        raise ValueError('unknown result format %r'%format)
+
+def read_results(path, format=None):
+    """Read a result set written by `write_results`.
+
+    Parameters
+    ----------
+
+    path: str
+        File or directory to read.
+    format: str, optional
+        One of `'npz'`, `'npy'` or `'parquet'`. By default this is implied
+        by the extension of `path`.
+
+    Returns
+    -------
+
+    dict
+        Dictionary of arrays keyed as in `RESULT_COLUMNS`. Columns of
+        `'npy'` results are read-only memory maps of the files.
+    """
+    format = format or result_format(path)
+    if format == 'npz':
+        with np.load(path) as archive:
+            return {name: archive[name] for name in RESULT_COLUMNS}
+    elif format == 'npy':
+        return {name: np.load(os.path.join(path, name+'.npy'), mmap_mode='r')
+                for name in RESULT_COLUMNS}
+    elif format == 'parquet':
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        return {name: table[name].to_numpy().astype(dtype, copy=False)
+                for name, dtype in RESULT_COLUMNS.items()}
+    raise ValueError('unknown result format %r'%format)
@@ -1,8 +1,12 @@
 """Module implementing various geodetic transformation functions."""
-from numpy import array, sin, cos, tan, sqrt, pi, arctan2, floor, stack
+from threading import Lock
+
+from numpy import (array, asarray, sin, cos, tan, sqrt, pi, arctan2, floor,
+                   stack, arange, meshgrid, hypot, eye, float64)
 
 __all__ = ['get_easting_northing_from_lat_long',
-           'WGS84toOSGB36']
+           'WGS84toOSGB36',
+           'ProjectionTable']
 
 class Ellipsoid(object):
     """Class acting as container for properties describing a terrestrial ellipsoid."""
@@ -150,9 +154,17 @@ class HelmertTransform(object):
                         [rz, 1+s, -rx],
                         [-ry, rx, 1+s]])
 
-    def __call__(self, X):
-        """ Transform a point or point set using the Helmert Transform."""
-        return self.T + self.M.dot(X.reshape((3,-1)))
+    def __call__(self, X, dtype=float64):
+        """ Transform a point or point set using the Helmert Transform.
+
+        With a `dtype` other than float64, only the shift of each point
+        (of hundreds of metres) is computed in that type, and added to the
+        points in float64."""
+        X = X.reshape((3,-1))
+        if dtype == float64:
+            return self.T + self.M.dot(X)
+        shift = self.T.astype(dtype) + (self.M-eye(3)).astype(dtype).dot(X.astype(dtype))
+        return X + shift
 
 WGS84toOSGB36transform = HelmertTransform(20.4894e-6,
                              -rad(0,0,0.1502),
@@ -161,17 +173,18 @@ WGS84toOSGB36transform = HelmertTransform(20.4894e-6,
                              array([-446.448, 125.157, -542.060]))
 
 
-def WGS84toOSGB36(latitude, longitude, radians=False):
+def WGS84toOSGB36(latitude, longitude, radians=False, dtype=float64):
     """ Wrapper to transform (latitude, longitude) pairs
-    from GPS to OS datum."""
+    from GPS to OS datum, computing the Helmert shift in `dtype`."""
 
     xyz = lat_long_to_xyz(latitude, longitude, radians)
-    xyz = WGS84toOSGB36transform(xyz)
+    xyz = WGS84toOSGB36transform(xyz, dtype)
     lat, lon = xyz_to_lat_long(xyz[0], xyz[1], xyz[2], radians)
     return lat, lon
 
 
-def get_easting_northing_from_lat_long(latitude, longitude, radians=False):
+def get_easting_northing_from_lat_long(latitude, longitude, radians=False, fast=False,
+                                       dtype=float64):
     """ Convert GPS (latitude, longitude) to OS (easting, northing).
     
     Parameters
@@ -182,6 +195,15 @@ def get_easting_northing_from_lat_long(latitude, longitude, radians=False):
                 Lonitudes to convert.
     radians : bool, optional
               Set to `True` if input is in radians. Otherwise degrees are assumed
+    fast : bool or ProjectionTable, optional
+           Set to `True` to interpolate from a precomputed `ProjectionTable`
+           within 1 m of the exact transform, or pass a table with the
+           required tolerance. Points outside the table use the exact transform.
+    dtype : numpy.dtype, optional
+            Floating point type of the results. With `numpy.float32`, the
+            Helmert shift and the projection series are computed in float32
+            on offsets from the projection origin, which keeps results
+            within 0.5 m of the float64 ones over Great Britain.
     
     Returns
     -------
@@ -197,21 +219,31 @@ def get_easting_northing_from_lat_long(latitude, longitude, radians=False):
     A guide to coordinate systems in Great Britain
     (https://webarchive.nationalarchives.gov.uk/20081023180830/http://www.ordnancesurvey.co.uk/oswebsite/gps/information/coordinatesystemsinfo/guidecontents/index.html)
 """
+    if fast:
+        if fast is True:
+            fast = default_projection_table()
+        if radians:
+            latitude, longitude = deg(asarray(latitude)), deg(asarray(longitude))
+        easting, northing = fast(latitude, longitude)
+        return easting.astype(dtype, copy=False), northing.astype(dtype, copy=False)
+
     if not radians:
        latitude = rad(array(latitude))
        longitude = rad(array(longitude))
 
-    latitude, longitude = WGS84toOSGB36(latitude, longitude, radians=True)
-    latitude = array(latitude)
-    longitude = array(longitude)
+    latitude, longitude = WGS84toOSGB36(latitude, longitude, radians=True, dtype=dtype)
+    # offsets from the true origin are taken in float64, before any rounding
+    dphi = array(latitude - osgb36.phi_0).astype(dtype)
+    sphi = array(latitude + osgb36.phi_0).astype(dtype)
+    dlam = array(longitude - osgb36.lam_0).astype(dtype)
+    latitude = array(latitude).astype(dtype)
     nu = (osgb36.a*osgb36.F_0)/sqrt(1 - osgb36.e2*sin(latitude)**2)
     rho = (osgb36.a*osgb36.F_0*(1 - osgb36.e2))/((1 - osgb36.e2*(sin(latitude)**2))**(3/2))
     heta = sqrt(nu/rho - 1)
-    M = osgb36.b*osgb36.F_0*((1 + osgb36.n + (5/4)*(osgb36.n**2) + (5/4)*(osgb36.n**3))*(latitude - osgb36.phi_0) -
-                           (3*osgb36.n + 3*(osgb36.n**2) + (21/8)*(osgb36.n**3))*sin(latitude - osgb36.phi_0)*cos(latitude + osgb36.phi_0) +
-                           ((15/8)*(osgb36.n**2) + (15/8)*(osgb36.n**3))*sin(2*(latitude - osgb36.phi_0))*cos(2*(latitude + osgb36.phi_0)) -
-                           (35/24)*(osgb36.n**3)*sin(3*(latitude - osgb36.phi_0))*cos(3*(latitude + osgb36.phi_0)))
-    I = M + osgb36.N_0
+    M = osgb36.b*osgb36.F_0*((1 + osgb36.n + (5/4)*(osgb36.n**2) + (5/4)*(osgb36.n**3))*dphi -
+                           (3*osgb36.n + 3*(osgb36.n**2) + (21/8)*(osgb36.n**3))*sin(dphi)*cos(sphi) +
+                           ((15/8)*(osgb36.n**2) + (15/8)*(osgb36.n**3))*sin(2*dphi)*cos(2*sphi) -
+                           (35/24)*(osgb36.n**3)*sin(3*dphi)*cos(3*sphi))
     II = (nu/2)*sin(latitude)*cos(latitude)
     III = (nu/24)*sin(latitude)*(cos(latitude)**3) * (5 - tan(latitude)**2 + 9*heta**2)
     IIIA = (nu/720) * sin(latitude)*(cos(latitude)**5) * (61 - 58*(tan(latitude)**2) + tan(latitude)**4)
@@ -219,7 +251,104 @@ def get_easting_northing_from_lat_long(latitude, longitude, radians=False):
     V = (nu/6) * (cos(latitude)**3) * ((nu/rho) - tan(latitude)**2)
     VI = (nu/120)*(cos(latitude)**5) * (5 - 18*(tan(latitude)**2) + tan(latitude)**4 + 14*heta**2 - 58*(tan(latitude)**2)*heta**2)
 
-    easting = osgb36.E_0 + IV*(longitude - osgb36.lam_0) + V*((longitude - osgb36.lam_0)**3) + VI*((longitude-osgb36.lam_0)**5)
-    northing = I + II*((longitude - osgb36.lam_0)**2) + III * ((longitude - osgb36.lam_0)**4) + IIIA*((longitude - osgb36.lam_0)**6)
+    easting = osgb36.E_0 + (IV*dlam + V*(dlam**3) + VI*(dlam**5))
+    northing = osgb36.N_0 + (M + II*(dlam**2) + III*(dlam**4) + IIIA*(dlam**6))
 
     return easting, northing
+
+
+# WGS84 (latitude, longitude) bounding box of Great Britain, in degrees
+
+GB_BOUNDS = (49.8, 61.0, -8.7, 2.1)
+
+class ProjectionTable(object):
+    """Bilinear interpolation table from GPS (latitude, longitude) to OS
+    (easting, northing).
+
+    The table samples `get_easting_northing_from_lat_long` on a regular
+    grid, halving the grid spacing until interpolation at every cell centre
+    (where bilinear interpolation of a smooth surface is least accurate)
+    is within `tolerance` metres of the exact transform.
+    """
+
+    def __init__(self, tolerance=1.0, bounds=GB_BOUNDS, step=0.1):
+        """
+        Parameters
+        ----------
+
+        tolerance: float, optional
+            Largest allowed distance, in metres, from the exact transform.
+        bounds: tuple of floats, optional
+            (south, north, west, east) limits of the table, in degrees.
+        step: float, optional
+            Initial grid spacing, in degrees.
+        """
+        self.tolerance = tolerance
+        self.bounds = bounds
+
+        while True:
+            self._build(step)
+            if self.max_error <= tolerance:
+                break
+            step /= 2
+
+    def _build(self, step):
+        south, north, west, east = self.bounds
+        self.step = step
+        self.latitude = arange(south, north+step, step)
+        self.longitude = arange(west, east+step, step)
+        lat, lon = meshgrid(self.latitude, self.longitude, indexing='ij')
+        easting, northing = get_easting_northing_from_lat_long(lat.ravel(), lon.ravel())
+        self.easting = easting.reshape(lat.shape)
+        self.northing = northing.reshape(lat.shape)
+
+        lat, lon = meshgrid(self.latitude[:-1]+step/2, self.longitude[:-1]+step/2,
+                            indexing='ij')
+        easting, northing = get_easting_northing_from_lat_long(lat.ravel(), lon.ravel())
+        approx_easting, approx_northing = self._interpolate(lat.ravel(), lon.ravel())
+        self.max_error = hypot(approx_easting-easting, approx_northing-northing).max()
+
+    def _interpolate(self, latitude, longitude):
+        south, _, west, _ = self.bounds
+        x = (latitude-south)/self.step
+        y = (longitude-west)/self.step
+        i = floor(x).clip(0, len(self.latitude)-2).astype(int)
+        j = floor(y).clip(0, len(self.longitude)-2).astype(int)
+        x -= i
+        y -= j
+
+        def bilinear(table):
+            return ((1-x)*((1-y)*table[i, j] + y*table[i, j+1])
+                    + x*((1-y)*table[i+1, j] + y*table[i+1, j+1]))
+
+        return bilinear(self.easting), bilinear(self.northing)
+
+    def __call__(self, latitude, longitude):
+        """Convert GPS (latitude, longitude) in degrees to OS (easting, northing).
+
+        Like the exact transform, this returns 1-D arrays, of one element
+        for scalar input.
+        """
+        latitude = asarray(latitude, dtype=float64).ravel()
+        longitude = asarray(longitude, dtype=float64).ravel()
+        easting, northing = self._interpolate(latitude, longitude)
+
+        south, north, west, east = self.bounds
+        outside = ((latitude < south) | (latitude > north)
+                   | (longitude < west) | (longitude > east))
+        if outside.any():
+            easting[outside], northing[outside] = \
+                get_easting_northing_from_lat_long(latitude[outside], longitude[outside])
+
+        return easting, northing
+
+_projection_table = None
+_projection_table_lock = Lock()
+
+def default_projection_table():
+    """Get the shared `ProjectionTable` with a 1 m tolerance, building it on first use."""
+    global _projection_table
+    with _projection_table_lock:
+        if _projection_table is None:
+            _projection_table = ProjectionTable()
+    return _projection_table
@@ -1,6 +1,860 @@
 """Live and historical flood monitoring data from the Environment Agency API"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-__all__  = []
+import numpy as np
+import pandas as pd
+
+from .tool import BANDS, band_codes
+
+__all__  = ['get_archive_day', 'historic_range', 'WarningRules',
+            'WarningPoller', 'interpolate_rainfall', 'RainfallBuffer',
+            'detect_events', 'ReadingCube']
 
 LIVE_URL = "http://environment.data.gov.uk/flood-monitoring/id/stations"
-ARCHIVE_URL = "http://environment.data.gov.uk/flood-monitoring/archive/"
\ No newline at end of file
+ARCHIVE_URL = "http://environment.data.gov.uk/flood-monitoring/archive/"
+READINGS_URL = "http://environment.data.gov.uk/flood-monitoring/data/readings"
+
+def archive_name(date):
+    """Name of the Environment Agency full readings archive for a date."""
+    return 'readings-full-%s.csv'%date
+
+def parse_archive(source, parameter='rainfall'):
+    """Parse a full readings archive into station, time and value arrays.
+
+    Parameters
+    ----------
+
+    source: str or file-like
+        URL, filename or open file of a `readings-full` csv archive.
+    parameter: str, optional
+        Measured quantity to keep.
+
+    Returns
+    -------
+
+    dict
+        Arrays `station` (str), `time` (datetime64[s]) and `value` (float64)
+        for every numeric reading of `parameter`.
+    """
+    df = pd.read_csv(source, usecols=['dateTime', 'stationReference',
+                                      'parameter', 'value'],
+                     dtype={'stationReference': str, 'parameter': str,
+                            'value': str})
+    df = df.loc[df['parameter'] == parameter]
+    value = pd.to_numeric(df['value'], errors='coerce').to_numpy(np.float64)
+    keep = ~np.isnan(value)
+    time = pd.to_datetime(df['dateTime'], utc=True).dt.tz_localize(None)
+
+    return {'station': df['stationReference'].to_numpy(str)[keep],
+            'time': time.to_numpy('datetime64[s]')[keep],
+            'value': value[keep]}
+
+def get_archive_day(date, cache_dir=None, archive_dir=None, parameter='rainfall'):
+    """Get the readings for a single day, using a local cache where possible.
+
+    Parsed days are stored as compressed `.npz` files in `cache_dir`, so
+    later calls read the arrays from disk rather than downloading and
+    parsing the archive again.
+
+    Parameters
+    ----------
+
+    date: str or datetime.date
+        Day of interest, as `YYYY-MM-DD`.
+    cache_dir: str, optional
+        Directory holding parsed days. No caching is done if not given.
+    archive_dir: str, optional
+        Directory of local `readings-full-YYYY-MM-DD.csv` archives to use
+        instead of the Environment Agency archive.
+    parameter: str, optional
+        Measured quantity to keep.
+
+    Returns
+    -------
+
+    dict
+        Arrays `station`, `time` and `value`, as from `parse_archive`.
+    """
+    date = str(date)
+
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, '%s-%s.npz'%(parameter, date))
+        if os.path.exists(cache_file):
+            with np.load(cache_file) as cached:
+                return {key: cached[key] for key in cached.files}
+
+    if archive_dir:
+        source = os.path.join(archive_dir, archive_name(date))
+    else:
+        source = ARCHIVE_URL + archive_name(date)
+
+    day = parse_archive(source, parameter)
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = cache_file + '.tmp.npz'
+        np.savez_compressed(tmp_file, **day)
+        os.replace(tmp_file, cache_file)
+
+    return day
+
+def historic_range(start, end, cache_dir=None, archive_dir=None,
+                   parameter='rainfall', workers=4):
+    """Get the readings for an inclusive range of days as a single table.
+
+    Days are fetched and parsed in parallel through a pool of `workers`
+    threads, then merged in time order.
+
+    Parameters
+    ----------
+
+    start: str or datetime.date
+        First day of interest, as `YYYY-MM-DD`.
+    end: str or datetime.date
+        Last day of interest, as `YYYY-MM-DD`.
+    cache_dir: str, optional
+        Directory holding parsed days, see `get_archive_day`.
+    archive_dir: str, optional
+        Directory of local archives, see `get_archive_day`.
+    parameter: str, optional
+        Measured quantity to keep.
+    workers: int, optional
+        Number of days to fetch concurrently.
+
+    Returns
+    -------
+
+    pandas.DataFrame
+        Readings indexed by `dateTime`, with columns `station` and `value`.
+    """
+    dates = pd.date_range(start, end, freq='D').strftime('%Y-%m-%d')
+
+    def fetch(date):
+        return get_archive_day(date, cache_dir, archive_dir, parameter)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        days = list(pool.map(fetch, dates))
+
+    if not days:
+        raise ValueError('empty date range %s to %s'%(start, end))
+
+    time = np.concatenate([day['time'] for day in days])
+    station = np.concatenate([day['station'] for day in days])
+    value = np.concatenate([day['value'] for day in days])
+
+    order = np.argsort(time, kind='stable')
+    index = pd.DatetimeIndex(time[order], name='dateTime')
+
+    return pd.DataFrame({'station': station[order], 'value': value[order]},
+                        index=index)
+
+# Flood warnings, indexed by warning level
+
+WARNINGS = np.array(['No Risk',
+                     'Yellow Warning, Medium Risk',
+                     'Red Warning, High Risk'])
+
+# Rainfall (mm per 15 minutes) which must be exceeded to raise a yellow, and
+# reached to raise a red, warning for each flood probability band.
+
+DEFAULT_THRESHOLDS = {'Zero': (np.inf, np.inf),
+                      'Very Low': (3., np.inf),
+                      'Low': (2., np.inf),
+                      'Medium': (2., 3.),
+                      'High': (-np.inf, 2.)}
+
+class WarningRules(object):
+    """Table-driven flood warnings from probability bands and rainfall.
+
+    Each band has a row of rainfall thresholds, one per warning level above
+    `No Risk`. The warning level for a location is the number of thresholds
+    in its band's row which the rainfall passes, so whole arrays of
+    locations are classified with a single table lookup. As in the step 3
+    warning table, a yellow threshold must be exceeded and a red threshold
+    only reached.
+    """
+
+    # Whether each level is raised by rainfall equal to its threshold
+    inclusive = np.array([False, True])
+
+    def __init__(self, thresholds=None):
+        """
+        Parameters
+        ----------
+
+        thresholds: dict, optional
+            Mapping from band name to a (yellow, red) pair of rainfall
+            thresholds, overriding entries of `DEFAULT_THRESHOLDS`.
+        """
+        table = dict(DEFAULT_THRESHOLDS)
+        table.update(thresholds or {})
+        unknown = set(table) - set(BANDS)
+        if unknown:
+            raise ValueError('unknown flood probability bands %s'%sorted(unknown))
+
+        # The extra final row never warns, and catches unknown bands (code -1).
+        self.thresholds = np.array([table[band] for band in BANDS]
+                                   +[(np.inf, np.inf)], dtype=np.float64)
+        if np.any(self.thresholds[:, 1:] < self.thresholds[:, :-1]):
+            raise ValueError('warning thresholds must increase with level')
+
+    def __call__(self, bands, rainfall):
+        """Get warning levels for arrays of bands and rainfall.
+
+        Parameters
+        ----------
+
+        bands: sequence of ints or strs
+            Flood probability band codes (see `tool.band_codes`) or names.
+        rainfall: float or sequence of floats
+            Rainfall in mm per 15 minutes. Missing values (`numpy.nan`)
+            are treated as no rain.
+
+        Returns
+        -------
+
+        numpy.ndarray of ints
+            Warning levels, indexing `WARNINGS`.
+        """
+        bands = np.asarray(bands)
+        if bands.dtype.kind in 'USO':
+            bands = band_codes(bands)
+        rainfall = np.nan_to_num(np.asarray(rainfall, dtype=np.float64), nan=0.0)
+        rainfall = np.broadcast_to(rainfall, bands.shape)
+
+        limits = self.thresholds[bands]
+        passed = np.where(self.inclusive, rainfall[..., None] >= limits,
+                          rainfall[..., None] > limits)
+        return passed.sum(axis=-1, dtype=np.int8)
+
+def parse_readings(items):
+    """Convert readings from the live API into station, time and value arrays.
+
+    Parameters
+    ----------
+
+    items: sequence of dicts
+        Readings as in the `items` of a `/data/readings` response.
+
+    Returns
+    -------
+
+    dict
+        Arrays `station`, `time` and `value`, as from `parse_archive`.
+    """
+    items = [item for item in items
+             if isinstance(item.get('value'), (int, float))]
+    # measure URLs end with the station reference, then the measure details
+    station = [item['measure'].rsplit('/', 1)[-1].split('-', 1)[0]
+               for item in items]
+    times = pd.to_datetime([item['dateTime'] for item in items], utc=True)
+
+    return {'station': np.array(station, dtype=str),
+            'time': times.tz_localize(None).to_numpy('datetime64[s]'),
+            'value': np.array([item['value'] for item in items],
+                              dtype=np.float64)}
+
+def fetch_readings(since=None, parameter='rainfall'):
+    """Fetch readings from the live Environment Agency API.
+
+    Parameters
+    ----------
+
+    since: numpy.datetime64, optional
+        Only fetch readings taken after this (UTC) time. The latest
+        reading of every station is fetched if not given.
+    parameter: str, optional
+        Measured quantity to fetch.
+
+    Returns
+    -------
+
+    dict
+        Arrays `station`, `time` and `value`, as from `parse_archive`.
+    """
+    import requests
+
+    params = {'parameter': parameter, '_limit': 10000}
+    if since is None:
+        params['latest'] = ''
+    else:
+        params['since'] = str(np.datetime64(since, 's'))+'Z'
+
+    resp = requests.get(READINGS_URL, params=params, timeout=60)
+    resp.raise_for_status()
+
+    return parse_readings(resp.json().get('items', []))
+
+class WarningPoller(object):
+    """Incrementally poll live rainfall and report changed flood warnings.
+
+    Each poll fetches only readings newer than the last one seen, updates
+    the latest value held for each station and recomputes warnings only for
+    the postcodes served by stations whose value changed.
+    """
+
+    def __init__(self, stations, postcode_station, bands, postcodes=None,
+                 rules=None, fetch=fetch_readings, interval=900.,
+                 retry=30., max_backoff=3600.):
+        """
+        Parameters
+        ----------
+
+        stations: sequence of strs
+            Station references. A station's position is its index.
+        postcode_station: sequence of ints
+            Index of the station serving each postcode, or -1 for none.
+        bands: sequence of ints or strs
+            Flood probability band of each postcode.
+        postcodes: sequence of strs, optional
+            Postcode labels used when reporting transitions.
+        rules: WarningRules, optional
+            Rules giving warning levels. Defaults to `WarningRules()`.
+        fetch: callable, optional
+            Function of the last reading time (or `None`) returning new
+            readings as from `fetch_readings`.
+        interval: float, optional
+            Seconds between polls.
+        retry: float, optional
+            Seconds before the first retry after a failed poll. The delay
+            doubles with each consecutive failure.
+        max_backoff: float, optional
+            Longest delay, in seconds, between retries.
+        """
+        self.stations = np.asarray(stations, dtype=str)
+        self.station_index = {s: i for i, s in enumerate(self.stations)}
+        self.postcode_station = np.asarray(postcode_station, dtype=np.intp)
+        self.bands = np.asarray(bands)
+        self.postcodes = (np.arange(len(self.postcode_station))
+                          if postcodes is None else np.asarray(postcodes))
+        self.rules = rules or WarningRules()
+        self.fetch = fetch
+        self.interval = interval
+        self.retry = retry
+        self.max_backoff = max_backoff
+        self.sleep = time.sleep
+
+        # postcodes grouped by serving station, in compressed row form
+        self._order = np.argsort(self.postcode_station, kind='stable')
+        self._offsets = np.searchsorted(self.postcode_station[self._order],
+                                        np.arange(len(self.stations)+1))
+
+        self.last_time = None
+        self.values = np.full(len(self.stations), np.nan)
+        self.warnings = self.rules(self.bands, self._rainfall(self.postcode_station))
+        self.stats = {'polls': 0, 'errors': 0, 'readings': 0,
+                      'stations_changed': 0, 'postcodes_recomputed': 0,
+                      'transitions': 0, 'last_latency': 0.0,
+                      'total_latency': 0.0}
+
+    def _rainfall(self, station):
+        """Latest rainfall at stations, with `nan` for unserved postcodes."""
+        return np.where(station >= 0, self.values[station], np.nan)
+
+    def poll(self):
+        """Fetch new readings once and update warnings.
+
+        Returns
+        -------
+
+        dict
+            Arrays `postcode`, `old` and `new` describing each postcode whose
+            warning level changed.
+        """
+        t0 = time.perf_counter()
+
+        readings = self.fetch(self.last_time)
+
+        new = np.ones(len(readings['time']), dtype=bool)
+        if self.last_time is not None:
+            new = readings['time'] > self.last_time
+        station = np.array([self.station_index.get(s, -1)
+                            for s in readings['station'][new]], dtype=np.intp)
+        times = readings['time'][new]
+        values = readings['value'][new]
+
+        known = station >= 0
+        station, times, values = station[known], times[known], values[known]
+        if len(times):
+            self.last_time = times.max()
+
+        # keep the newest reading for each station
+        order = np.lexsort((times, station))[::-1]
+        station, first = np.unique(station[order], return_index=True)
+        values = values[order][first]
+
+        changed = station[~(values == self.values[station])]
+        self.values[station] = values
+
+        postcode = np.concatenate([self._order[self._offsets[s]:self._offsets[s+1]]
+                                   for s in changed]+[np.empty(0, np.intp)])
+        old = self.warnings[postcode]
+        self.warnings[postcode] = self.rules(self.bands[postcode],
+                                             self._rainfall(self.postcode_station[postcode]))
+        diff = self.warnings[postcode] != old
+        transitions = {'postcode': self.postcodes[postcode[diff]],
+                       'old': old[diff],
+                       'new': self.warnings[postcode[diff]]}
+
+        latency = time.perf_counter() - t0
+        self.stats['polls'] += 1
+        self.stats['readings'] += len(times)
+        self.stats['stations_changed'] += len(changed)
+        self.stats['postcodes_recomputed'] += len(postcode)
+        self.stats['transitions'] += int(diff.sum())
+        self.stats['last_latency'] = latency
+        self.stats['total_latency'] += latency
+
+        return transitions
+
+    def run(self, callback, cycles=None):
+        """Poll repeatedly, passing non-empty transitions to `callback`.
+
+        Parameters
+        ----------
+
+        callback: callable
+            Called with the transitions from each poll which changed a warning.
+        cycles: int, optional
+            Number of polls (successful or not) to make. Runs forever if not given.
+        """
+        failures = 0
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            cycle += 1
+            try:
+                transitions = self.poll()
+            except Exception:
+                failures += 1
+                self.stats['errors'] += 1
+                self.sleep(min(self.max_backoff, self.retry*2**(failures-1)))
+                continue
+
+            failures = 0
+            if len(transitions['postcode']):
+                callback(transitions)
+            if cycles is None or cycle < cycles:
+                self.sleep(self.interval)
+
+def interpolate_rainfall(station_easting, station_northing, values,
+                         easting, northing, k=4, radius=10000., power=2.,
+                         workers=1):
+    """Estimate rainfall at points by inverse distance weighting of stations.
+
+    The `k` nearest stations within `radius` of each point are found with a
+    single batched k-d tree query, and combined with weights proportional to
+    distance**(-`power`).
+
+    Parameters
+    ----------
+
+    station_easting: numpy.ndarray of floats
+        OS Eastings of stations.
+    station_northing: numpy.ndarray of floats
+        OS Northings of stations.
+    values: numpy.ndarray of floats
+        Rainfall at each station. Stations with `numpy.nan` are ignored.
+    easting: numpy.ndarray of floats
+        OS Eastings of locations of interest, e.g. `Tool.dfp['Easting']`.
+    northing: numpy.ndarray of floats
+        OS Northings of locations of interest.
+    k: int, optional
+        Largest number of stations to combine per location.
+    radius: float, optional
+        Largest distance (in metres) of a station from a location.
+    power: float, optional
+        Power of inverse distance used for the weights.
+    workers: int, optional
+        Number of threads for the neighbour search, -1 for all cores.
+
+    Returns
+    -------
+
+    numpy.ndarray of floats
+        Rainfall estimates for the input locations. Locations with no
+        station within `radius` return `numpy.nan`.
+    """
+    from scipy.spatial import cKDTree
+
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    stations = np.column_stack((np.asarray(station_easting, dtype=np.float64)[valid],
+                                np.asarray(station_northing, dtype=np.float64)[valid]))
+    values = values[valid]
+    points = np.column_stack((np.asarray(easting, dtype=np.float64),
+                              np.asarray(northing, dtype=np.float64)))
+
+    k = min(k, len(values))
+    if k == 0:
+        return np.full(len(points), np.nan)
+
+    dist, idx = cKDTree(stations).query(points, k=k, distance_upper_bound=radius,
+                                        workers=workers)
+    dist = dist.reshape(len(points), k)
+    idx = idx.reshape(len(points), k)
+
+    found = np.isfinite(dist)
+    with np.errstate(divide='ignore'):
+        weight = np.where(found, dist**-power, 0.0)
+
+    # a station at the location itself takes all the weight
+    exact = found & (dist == 0)
+    on_station = exact.any(axis=1)
+    weight[on_station] = exact[on_station]
+
+    idx = np.where(found, idx, 0)
+    total = weight.sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        rain = (weight*values[idx]).sum(axis=1)/total
+    rain[total == 0] = np.nan
+
+    return rain
+
+# Accumulation windows, in 15 minute slots
+
+WINDOWS = {'1h': 4, '6h': 24, '24h': 96}
+
+class RainfallBuffer(object):
+    """Rolling rainfall accumulations for many stations.
+
+    Readings are held in a preallocated ring buffer of 15 minute slots by
+    station index. Each window's rolling sum is updated by adding the new
+    slot and subtracting the slot leaving the window, so ingestion costs
+    O(1) per station whatever the window lengths. The accumulations can be
+    passed to `WarningRules` built with matching thresholds.
+    """
+
+    def __init__(self, n_stations, windows=None, dtype=np.float64):
+        """
+        Parameters
+        ----------
+
+        n_stations: int
+            Number of stations held.
+        windows: dict, optional
+            Mapping from window name to length in slots. Defaults to `WINDOWS`.
+        dtype: numpy.dtype, optional
+            Storage type of the buffer and sums.
+        """
+        self.windows = dict(windows or WINDOWS)
+        self.size = max(self.windows.values())
+        self.buffer = np.zeros((self.size, n_stations), dtype=dtype)
+        self.sums = {name: np.zeros(n_stations, dtype=dtype)
+                     for name in self.windows}
+        self.position = 0
+        self.count = 0
+
+    def push(self, values, stations=None):
+        """Add the readings of the next 15 minute slot.
+
+        Parameters
+        ----------
+
+        values: numpy.ndarray of floats
+            Rainfall in the slot. Missing readings (`numpy.nan`) count as
+            no rain.
+        stations: numpy.ndarray of ints, optional
+            Station indices of `values`. If not given, `values` holds every
+            station and stations not listed otherwise record no rain.
+        """
+        row = np.zeros(self.buffer.shape[1], dtype=self.buffer.dtype)
+        if stations is None:
+            row[:] = np.nan_to_num(values, nan=0.0)
+        else:
+            row[stations] = np.nan_to_num(values, nan=0.0)
+
+        for name, length in self.windows.items():
+            self.sums[name] += row
+            self.sums[name] -= self.buffer[(self.position-length) % self.size]
+
+        self.buffer[self.position] = row
+        self.position = (self.position+1) % self.size
+        self.count += 1
+
+        # resynchronise once per cycle so rounding errors can't accumulate
+        if self.position == 0:
+            self.resync()
+
+    def resync(self):
+        """Recompute the rolling sums from the buffer."""
+        for name, length in self.windows.items():
+            slots = (self.position-1-np.arange(length)) % self.size
+            self.sums[name][:] = self.buffer[slots].sum(axis=0)
+
+    def accumulation(self, window):
+        """Get the rolling rainfall sum over a window.
+
+        Parameters
+        ----------
+
+        window: str
+            Window name, e.g. `'6h'`.
+
+        Returns
+        -------
+
+        numpy.ndarray of floats
+            Rainfall over the most recent `window` for each station.
+        """
+        return self.sums[window].copy()
+
+def _runs(exceed):
+    """Find runs of True along the rows of a 2-D boolean array.
+
+    Returns
+    -------
+
+    row, start, end: numpy.ndarray of ints
+        Row, first column and one past the last column of each run, in
+        row major order.
+    """
+    padded = np.zeros((exceed.shape[0], exceed.shape[1]+2), dtype=np.int8)
+    padded[:, 1:-1] = exceed
+    change = np.diff(padded, axis=1)
+    row, start = np.nonzero(change == 1)
+    _, end = np.nonzero(change == -1)
+    return row, start, end
+
+def detect_events(values, threshold, window=1, stations=None, times=None,
+                  station_easting=None, station_northing=None, distance=0.,
+                  gap=0):
+    """Detect storm events in rainfall readings of many stations.
+
+    Runs of slots where the rainfall (or its rolling sum over `window`
+    slots) exceeds `threshold` are found for all stations at once by run
+    length encoding, then runs closer than `gap` slots in time, on the same
+    station or on stations within `distance` metres of each other, are
+    merged into events.
+
+    Parameters
+    ----------
+
+    values: numpy.ndarray of floats
+        (stations, slots) rainfall readings, `numpy.nan` where missing.
+    threshold: float
+        Rainfall (per `window`) which must be exceeded.
+    window: int, optional
+        Number of slots in the rolling sum tested.
+    stations: numpy.ndarray, optional
+        Station names of the rows. Defaults to the row numbers.
+    times: numpy.ndarray of datetime64, optional
+        Start times of the slots. Defaults to the slot numbers.
+    station_easting, station_northing: numpy.ndarray of floats, optional
+        Locations of the stations, needed to merge across stations.
+    distance: float, optional
+        Largest distance in metres between stations of merged runs.
+    gap: int, optional
+        Largest number of slots between merged runs.
+
+    Returns
+    -------
+
+    pandas.DataFrame
+        Event table ordered by start, with the `station` of the peak, the
+        number of `stations` involved, the `start` and `end` (last) slot,
+        the `peak` of the tested rainfall or rolling sum, and the `total`
+        rainfall over the event's runs, including the `window`-1 slots
+        leading into each run.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    rain = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+    n_stations, n_slots = rain.shape
+    cumulative = np.zeros((n_stations, n_slots+1))
+    np.cumsum(rain, axis=1, out=cumulative[:, 1:])
+    tested = cumulative[:, 1:] - cumulative[:, np.maximum(np.arange(n_slots)+1-window, 0)]
+
+    row, start, end = _runs(tested > threshold)
+    # count the rain of the window which triggered each run, but not rain
+    # already counted by the previous run of the same station
+    lead = np.maximum(start+1-window, 0)
+    if len(row):
+        previous = np.r_[0, np.where(row[1:] == row[:-1], end[:-1], 0)]
+        lead = np.maximum(lead, previous)
+    total = cumulative[row, end] - cumulative[row, lead]
+    # peak of each run, reducing the flattened array between run bounds
+    flat = np.append(tested.ravel(), 0.0)
+    bounds = np.column_stack((row*n_slots+start, row*n_slots+end)).ravel()
+    peak = np.maximum.reduceat(flat, bounds)[::2] if len(row) else np.zeros(0)
+
+    # link runs starting within `gap` slots of the end of an earlier run
+    order = np.lexsort((row, start))
+    row, start, end, total, peak = row[order], start[order], end[order], total[order], peak[order]
+    last = np.searchsorted(start, end+gap, side='right')
+    count = np.maximum(last-np.arange(len(start))-1, 0)
+    first = np.repeat(np.arange(len(start)), count)
+    second = first + 1 + np.arange(count.sum()) - np.repeat(np.cumsum(count)-count, count)
+    if station_easting is None:
+        near = row[first] == row[second]
+    else:
+        near = np.hypot(np.asarray(station_easting)[row[first]]-np.asarray(station_easting)[row[second]],
+                        np.asarray(station_northing)[row[first]]-np.asarray(station_northing)[row[second]]) <= distance
+    graph = coo_matrix((np.ones(near.sum()), (first[near], second[near])),
+                       shape=(len(start), len(start)))
+    _, event = connected_components(graph, directed=False)
+
+    n_events = event.max()+1 if len(event) else 0
+    event_start = np.full(n_events, n_slots)
+    np.minimum.at(event_start, event, start)
+    event_end = np.zeros(n_events, dtype=np.intp)
+    np.maximum.at(event_end, event, end-1)
+    event_peak = np.full(n_events, -np.inf)
+    np.maximum.at(event_peak, event, peak)
+    # run with the highest peak of each event, for its station
+    best = np.lexsort((-peak, event))
+    best = best[np.r_[True, event[best][1:] != event[best][:-1]]] if len(best) else best
+    stations_per_event = np.bincount(np.unique(event*n_stations+row)//n_stations,
+                                     minlength=n_events)
+
+    names = np.arange(n_stations) if stations is None else np.asarray(stations)
+    slot_times = np.arange(n_slots) if times is None else np.asarray(times)
+    table = pd.DataFrame({'station': names[row[best]],
+                          'stations': stations_per_event,
+                          'start': slot_times[event_start],
+                          'end': slot_times[event_end],
+                          'peak': event_peak,
+                          'total': np.bincount(event, total, minlength=n_events)})
+    return table.sort_values(['start', 'station'], ignore_index=True)
+
+# Length of a reading slot
+
+SLOT = np.timedelta64(15, 'm')
+
+def parse_times(times):
+    """Convert UTC ISO 8601 timestamps, e.g. `'2019-10-06T10:15:00Z'`, to
+    `datetime64[s]` in one vectorized conversion."""
+    times = np.asarray(times)
+    if times.dtype.kind == 'M':
+        return times.astype('datetime64[s]')
+    return np.char.rstrip(times.astype(str), 'Z').astype('datetime64[s]')
+
+class ReadingCube(object):
+    """Dense station by time slot array of readings.
+
+    `values` is a (stations, slots) float array of the readings in each 15
+    minute slot, `numpy.nan` where there is none, and `mask` marks the
+    slots holding readings. Station rows are in sorted name order, so rows
+    are found by binary search.
+    """
+
+    def __init__(self, stations, times, values):
+        """
+        Parameters
+        ----------
+
+        stations: numpy.ndarray of strs
+            Sorted station names of the rows.
+        times: numpy.ndarray of datetime64
+            Start times of the slots.
+        values: numpy.ndarray of floats
+            (stations, slots) readings, `numpy.nan` where missing.
+        """
+        self.stations = np.asarray(stations)
+        self.times = np.asarray(times)
+        self.values = np.asarray(values)
+        self.mask = ~np.isnan(self.values)
+
+    @classmethod
+    def from_readings(cls, readings, start=None, end=None, dtype=np.float64):
+        """Build a cube from a set of readings.
+
+        Parameters
+        ----------
+
+        readings: dict or pandas.DataFrame
+            Arrays `station`, `time` (datetime64 or ISO 8601 strings) and
+            `value`, as from `get_archive_day`, or a table of readings as
+            from `historic_range`.
+        start, end: str or numpy.datetime64, optional
+            First and last slot times. Default to the span of the readings.
+        dtype: numpy.dtype, optional
+            Type of the values.
+
+        Returns
+        -------
+
+        ReadingCube
+            The readings, with the latest reading of a station used where
+            several fall in one slot.
+        """
+        if isinstance(readings, pd.DataFrame):
+            time = readings.index.to_numpy() if 'time' not in readings else readings['time']
+        else:
+            time = readings['time']
+        time = parse_times(time)
+        station = np.asarray(readings['station'], dtype=str)
+        value = np.asarray(readings['value'], dtype=dtype)
+
+        if start is None and not len(time):
+            return cls(np.zeros(0, dtype=str), np.zeros(0, dtype='datetime64[s]'),
+                       np.zeros((0, 0), dtype=dtype))
+        first = np.datetime64(start, 's') if start is not None else time.min()
+        first = first - (first - np.datetime64(0, 's')) % SLOT
+        if end is not None:
+            last = np.datetime64(end, 's')
+        else:
+            last = time.max() if len(time) else first
+        n_slots = max(int((last - first)//SLOT) + 1, 0)
+
+        stations, row = np.unique(station, return_inverse=True)
+        slot = (time - first)//SLOT
+        keep = np.flatnonzero((slot >= 0) & (slot < n_slots))
+        # keep the latest reading of each station and slot, the stable sort
+        # leaving the last given of equal times at the end of its group
+        cell = row[keep]*n_slots + slot[keep]
+        keep = keep[np.lexsort((time[keep], cell))]
+        cell = row[keep]*n_slots + slot[keep]
+        keep = keep[np.r_[cell[1:] != cell[:-1], True]] if len(keep) else keep
+
+        values = np.full((len(stations), n_slots), np.nan, dtype=dtype)
+        values[row[keep], slot[keep]] = value[keep]
+
+        return cls(stations, first + SLOT*np.arange(n_slots), values)
+
+    def rows(self, stations):
+        """Get the rows of station names, with -1 for unknown stations."""
+        stations = np.asarray(stations, dtype=str)
+        if not len(self.stations):
+            return np.full(stations.shape, -1)
+        idx = np.searchsorted(self.stations, stations).clip(0, len(self.stations)-1)
+        return np.where(self.stations[idx] == stations, idx, -1)
+
+    def station_totals(self):
+        """Get the sum of the readings of each station."""
+        return np.nansum(self.values, axis=1)
+
+    def slot_means(self, rows=None):
+        """Get the mean reading of each slot over the stations in `rows`
+        (by default all stations), or `numpy.nan` for slots without
+        readings."""
+        values = self.values if rows is None else self.values[rows]
+        mask = self.mask if rows is None else self.mask[rows]
+        count = mask.sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            return np.where(count > 0, np.nansum(values, axis=0)/count, np.nan)
+
+    def accumulate(self, slots):
+        """Sum readings over consecutive blocks of `slots` slots.
+
+        Returns
+        -------
+
+        times: numpy.ndarray of datetime64
+            Start time of each block.
+        totals: numpy.ndarray of floats
+            (stations, blocks) sums, `numpy.nan` for blocks without readings.
+        """
+        blocks = -(-self.values.shape[1]//slots)
+        pad = blocks*slots - self.values.shape[1]
+        values = np.pad(self.values, ((0, 0), (0, pad)), constant_values=np.nan)
+        values = values.reshape(len(self.stations), blocks, slots)
+        totals = np.where(np.isnan(values).all(axis=2), np.nan, np.nansum(values, axis=2))
+        return self.times[::slots], totals
+
+    def events(self, threshold, **kwargs):
+        """Detect storm events in the cube, see `detect_events`."""
+        return detect_events(self.values, threshold, stations=self.stations,
+                             times=self.times, **kwargs)
@@ -0,0 +1,207 @@
+"""Monte Carlo simulation of annual portfolio flood losses.
+
+Each simulated year, every correlation group (for example all the postcodes
+inside one flood zone) floods with its annual probability, losing its whole
+loss amount. Years are simulated in chunks, each drawn from its own seeded
+random stream, and their portfolio losses folded into a `LossStatistics`
+accumulator, so that memory does not grow with the number of years.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+__all__ = ['LossStatistics', 'simulate_losses']
+
+class LossStatistics(object):
+    """Streaming count, mean, variance, range and quantiles of losses.
+
+    Means and variances are accumulated exactly with the pairwise update of
+    Chan et al., quantiles approximately from a histogram with geometrically
+    spaced bins, so accumulators of separate runs can be merged.
+    """
+
+    def __init__(self, upper, bins=2048, resolution=1.0e-6):
+        """
+        Parameters
+        ----------
+
+        upper: float
+            Largest loss expected, the upper edge of the histogram.
+        bins: int, optional
+            Number of histogram bins between `upper*resolution` and `upper`.
+        resolution: float, optional
+            Smallest loss binned, relative to `upper`. Smaller losses share
+            one bin.
+        """
+        upper = max(float(upper), np.finfo(np.float64).tiny/resolution)
+        self.edges = np.geomspace(upper*resolution, upper, bins+1)
+        self.counts = np.zeros(bins+2, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, losses):
+        """Add a batch of losses."""
+        losses = np.asarray(losses, dtype=np.float64).ravel()
+        if not len(losses):
+            return
+        other = LossStatistics.__new__(LossStatistics)
+        other.edges = self.edges
+        other.counts = np.bincount(np.searchsorted(self.edges, losses, side='right'),
+                                   minlength=len(self.counts))
+        other.count = len(losses)
+        other.mean = losses.mean()
+        other.m2 = ((losses-other.mean)**2).sum()
+        other.min = losses.min()
+        other.max = losses.max()
+        self.merge(other)
+
+    def merge(self, other):
+        """Add the losses of another accumulator with the same bins."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta*other.count/count
+        self.m2 += other.m2 + delta**2*self.count*other.count/count
+        self.count = count
+        self.counts += other.counts
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """Sample variance of the losses."""
+        return self.m2/(self.count-1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation of the losses."""
+        return np.sqrt(self.variance)
+
+    def quantile(self, q):
+        """Estimate quantiles of the losses.
+
+        Parameters
+        ----------
+
+        q: float or numpy.ndarray of floats
+            Quantiles wanted, between 0 and 1.
+
+        Returns
+        -------
+
+        float or numpy.ndarray of floats
+            Losses interpolated within their histogram bins.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if not self.count:
+            return np.full(q.shape, np.nan)[()]
+        cumulative = np.cumsum(self.counts)
+        target = q*self.count
+        i = np.searchsorted(cumulative, target, side='left').clip(0, len(self.counts)-1)
+        left = np.concatenate(([self.min], self.edges))[i]
+        right = np.concatenate((self.edges, [self.max]))[i]
+        below = np.where(i > 0, cumulative[i-1], 0)
+        fraction = np.divide(target-below, self.counts[i],
+                             out=np.zeros(q.shape), where=self.counts[i] > 0)
+        return np.clip(left + fraction.clip(0, 1)*(right-left), self.min, self.max)[()]
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99, 0.995)):
+        """Get the statistics as a dictionary."""
+        out = {'years': int(self.count), 'mean': float(self.mean),
+               'std': float(self.std), 'min': float(self.min),
+               'max': float(self.max)}
+        for q, value in zip(quantiles, np.atleast_1d(self.quantile(quantiles))):
+            out['q%g'%q] = float(value)
+        return out
+
+def simulate_chunk(probabilities, losses, years, seed):
+    """Simulate portfolio losses for a number of years.
+
+    Parameters
+    ----------
+
+    probabilities: numpy.ndarray of floats
+        Annual flood probability of each group.
+    losses: numpy.ndarray of floats
+        Loss of each group when it floods.
+    years: int
+        Number of years simulated.
+    seed: numpy.random.SeedSequence or int
+        Seed of the random stream.
+
+    Returns
+    -------
+
+    numpy.ndarray of floats
+        Total loss of each year.
+    """
+    rng = np.random.default_rng(seed)
+    return (rng.random((years, len(probabilities))) < probabilities) @ losses
+
+def _run_chunk(probabilities, losses, years, seed, upper, bins):
+    stats = LossStatistics(upper, bins)
+    stats.update(simulate_chunk(probabilities, losses, years, seed))
+    return stats
+
+def simulate_losses(probabilities, losses, years=10000, seed=None, workers=1,
+                    chunk_elements=2**22, bins=2048):
+    """Simulate the distribution of annual portfolio losses.
+
+    Years are split into chunks of about `chunk_elements` group draws, each
+    chunk seeded by spawning from `seed`, so results depend only on the
+    seed and not on the number of workers.
+
+    Parameters
+    ----------
+
+    probabilities: numpy.ndarray of floats
+        Annual flood probability of each correlation group.
+    losses: numpy.ndarray of floats
+        Loss of each group when it floods.
+    years: int, optional
+        Number of years simulated.
+    seed: int, optional
+        Seed of the simulation.
+    workers: int, optional
+        Number of worker processes, or 1 to simulate in this process.
+    chunk_elements: int, optional
+        Approximate number of random draws per chunk.
+    bins: int, optional
+        Histogram bins of the quantile estimates.
+
+    Returns
+    -------
+
+    LossStatistics
+        Statistics of the simulated annual losses.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    losses = np.asarray(losses, dtype=np.float64)
+    # groups which never flood or lose nothing do not change the losses
+    keep = (probabilities > 0) & (losses != 0)
+    probabilities, losses = probabilities[keep], losses[keep]
+
+    upper = np.abs(losses).sum()
+    chunk_years = max(1, chunk_elements//max(1, len(losses)))
+    sizes = [min(chunk_years, years-start) for start in range(0, years, chunk_years)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    stats = LossStatistics(upper, bins)
+
+    if workers <= 1:
+        for size, chunk_seed in zip(sizes, seeds):
+            stats.merge(_run_chunk(probabilities, losses, size, chunk_seed, upper, bins))
+        return stats
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_run_chunk, probabilities, losses, size, chunk_seed,
+                               upper, bins)
+                   for size, chunk_seed in zip(sizes, seeds)]
+        # merge in submission order, so floating point sums are reproducible
+        for future in futures:
+            stats.merge(future.result())
+
+    return stats
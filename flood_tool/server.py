@@ -0,0 +1,265 @@
+"""Local HTTP/JSON query service for a warm `Tool`.
+
+Concurrent requests arriving within a short window are coalesced into a
+single vectorized `Tool` call, and the results fanned back out, so that
+many small requests share the per-call overhead.
+
+Endpoints are
+
+``POST /query``
+    Body ``{"postcodes": [...]}``, returning the latitude, longitude,
+    probability band, flood cost and annual flood risk of each postcode.
+``GET /metrics``
+    Request, batch size and latency statistics.
+
+Example::
+
+    python -m flood_tool.server --cache tool.pkl --port 8080
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+__all__ = ['MicroBatcher', 'ToolServer']
+
+class MicroBatcher(object):
+    """Coalesce concurrent calls into batched calls of a vectorized function."""
+
+    def __init__(self, func, window=0.002, max_batch=100000, history=1000):
+        """
+        Parameters
+        ----------
+
+        func: callable
+            Function of a list of items returning a sequence of results of
+            the same length.
+        window: float, optional
+            Seconds to wait for more requests after the first of a batch.
+        max_batch: int, optional
+            Largest number of items in a batch.
+        history: int, optional
+            Number of recent requests and batches kept for the metrics.
+        """
+        self.func = func
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=history)
+        self._batch_sizes = deque(maxlen=history)
+        self.requests = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        """Queue items for the next batch, returning a `Future` of their results."""
+        future = Future()
+        with self._ready:
+            self._queue.append((list(items), future, time.perf_counter()))
+            self._ready.notify()
+        return future
+
+    def __call__(self, items):
+        """Get the results for items, waiting for their batch to run."""
+        return self.submit(items).result()
+
+    def close(self):
+        """Stop the batching thread once the queue is empty."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+        self._thread.join()
+
+    def _next_batch(self):
+        with self._ready:
+            while not self._queue and not self._closed:
+                self._ready.wait()
+            if not self._queue:
+                return None
+        time.sleep(self.window)
+        batch, size = [], 0
+        with self._ready:
+            while self._queue and (not batch or size+len(self._queue[0][0]) <= self.max_batch):
+                request = self._queue.popleft()
+                batch.append(request)
+                size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not self._call(batch):
+                # one bad request fails the whole call, so rerun the requests
+                # separately to fail only the bad ones
+                for request in batch:
+                    self._call([request])
+
+    def _call(self, batch):
+        """Run one call for a batch, returning False if it raised in a batch
+        of several requests, whose futures are then left unset."""
+        items = [item for request in batch for item in request[0]]
+        try:
+            results = self.func(items)
+        except Exception as err:
+            if len(batch) > 1:
+                return False
+            batch[0][1].set_exception(err)
+            return True
+
+        done = time.perf_counter()
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self._batch_sizes.append(len(items))
+            self._latencies.extend(done-submitted for _, _, submitted in batch)
+
+        start = 0
+        for request, future, _ in batch:
+            future.set_result(results[start:start+len(request)])
+            start += len(request)
+        return True
+
+    def metrics(self):
+        """Get request counts, batch sizes and latencies (in seconds)."""
+        with self._lock:
+            latencies = np.array(self._latencies)
+            sizes = np.array(self._batch_sizes)
+            out = {'requests': self.requests, 'batches': self.batches}
+        if len(latencies):
+            out['latency'] = {'mean': float(latencies.mean()),
+                              'p50': float(np.percentile(latencies, 50)),
+                              'p99': float(np.percentile(latencies, 99)),
+                              'max': float(latencies.max())}
+        if len(sizes):
+            out['batch_size'] = {'mean': float(sizes.mean()),
+                                 'max': int(sizes.max())}
+        return out
+
+class ToolServer(ThreadingHTTPServer):
+    """HTTP server answering postcode queries from a warm `Tool`."""
+
+    daemon_threads = True
+
+    def __init__(self, tool, address=('127.0.0.1', 0), window=0.002,
+                 max_batch=100000):
+        """
+        Parameters
+        ----------
+
+        tool: Tool
+            Tool answering the queries.
+        address: tuple, optional
+            (host, port) to listen on. Port 0 picks a free port.
+        window: float, optional
+            Seconds to collect requests into a batch, see `MicroBatcher`.
+        max_batch: int, optional
+            Largest number of postcodes in a batch.
+        """
+        super().__init__(address, _Handler)
+        self.tool = tool
+        self.batcher = MicroBatcher(self.query, window, max_batch)
+
+    def query(self, postcodes):
+        """Get the answers for a list of postcodes with one vectorized pass."""
+        from .tool import BANDS, normalize_postcodes
+
+        postcodes = normalize_postcodes(postcodes)
+        lat_long = self.tool.get_lat_long(postcodes)
+        bands, cost, risk = self.tool.get_postcode_scores(postcodes)
+
+        def value(x):
+            return None if np.isnan(x) else x
+
+        return [{'postcode': postcode,
+                 'latitude': value(lat), 'longitude': value(lon),
+                 'band': str(BANDS[band]) if band >= 0 else None,
+                 'cost': value(c), 'risk': value(r)}
+                for postcode, lat, lon, band, c, r
+                in zip(postcodes.tolist(), lat_long[:, 0].tolist(),
+                       lat_long[:, 1].tolist(), bands.tolist(),
+                       cost.tolist(), risk.tolist())]
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._reply(200, self.server.batcher.metrics())
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/query':
+            self._reply(404, {'error': 'not found'})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            postcodes = body['postcodes']
+            if isinstance(postcodes, str):
+                postcodes = [postcodes]
+            if not (isinstance(postcodes, list)
+                    and all(isinstance(postcode, str) for postcode in postcodes)):
+                raise TypeError('postcodes must be a list of strings')
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {'error': 'expected {"postcodes": [...]}'})
+            return
+        try:
+            results = self.server.batcher(postcodes)
+        except Exception as err:
+            self._reply(500, {'error': '%s: %s'%(type(err).__name__, err)})
+            return
+        self._reply(200, {'results': results})
+
+    def log_message(self, format, *args):
+        pass
+
+def main(argv=None):
+    """Run the query server."""
+    from .__main__ import RESOURCES, load_tool
+
+    parser = argparse.ArgumentParser(prog='python -m flood_tool.server',
+                                     description=__doc__.split('\n\n')[0])
+    parser.add_argument("--host", dest="host", default='127.0.0.1')
+    parser.add_argument("--port", dest="port", type=int, default=8080)
+    parser.add_argument("--window", dest="window", type=float, default=0.002,
+                        help="seconds to collect requests into a batch")
+    parser.add_argument("--cache", dest="cache", default='',
+                        help="preprocessed Tool data, written if missing")
+    parser.add_argument("--postcode-file", dest="postcode_file",
+                        default=os.sep.join((RESOURCES, 'postcodes.csv')))
+    parser.add_argument("--risk-file", dest="risk_file",
+                        default=os.sep.join((RESOURCES, 'flood_probability.csv')))
+    parser.add_argument("--values-file", dest="values_file",
+                        default=os.sep.join((RESOURCES, 'property_value.csv')))
+    args = parser.parse_args(argv)
+
+    tool = load_tool(args.postcode_file, args.risk_file, args.values_file,
+                     args.cache or None)
+    with ToolServer(tool, (args.host, args.port), args.window) as server:
+        server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Shared fixtures for the flood_tool tests."""
+
+import os
+
+import numpy as np
+import pandas as pd
+from pytest import fixture
+
+from flood_tool import geo
+
+RESOURCES = os.sep.join((os.path.dirname(__file__), '..', 'resources'))
+
+@fixture(scope="session")
+def tool_files(tmp_path_factory):
+    """Small postcode, flood probability and property value files."""
+    rng = np.random.default_rng(1936)
+    path = tmp_path_factory.mktemp('tool')
+
+    postcodes = pd.read_csv(os.sep.join((RESOURCES, 'postcodes.csv')),
+                            nrows=300)
+    lat, lon = geo.WGS84toOSGB36(postcodes['Latitude'], postcodes['Longitude'])
+    easting, northing = geo.get_easting_northing_from_lat_long(lat, lon)
+
+    zones = pd.DataFrame({'X': easting[::10]+rng.uniform(-500, 500, 30),
+                          'Y': northing[::10]+rng.uniform(-500, 500, 30),
+                          'radius': rng.uniform(100, 3000, 30),
+                          'prob_4band': np.tile(['High', 'Medium',
+                                                 'Low', 'Very Low'], 8)[:30]})
+
+    values = postcodes[['Postcode']].iloc[:280].copy()
+    values['Postcode'] = values['Postcode'].str[:-3]+' '+values['Postcode'].str[-3:]
+    values['Total Value'] = rng.uniform(1.0e5, 5.0e7, len(values)).round(2)
+    values['Number Properties'] = rng.integers(1, 50, len(values))
+
+    files = (str(path/'postcodes.csv'), str(path/'flood_probability.csv'),
+             str(path/'property_value.csv'))
+    postcodes.to_csv(files[0], index=False)
+    zones.to_csv(files[1], index=False)
+    values.to_csv(files[2], index=False)
+
+    return files
+
+@fixture(scope="session")
+def tool(tool_files):
+    """Tool built from the small fixture files."""
+    from flood_tool import Tool
+
+    return Tool(*tool_files)
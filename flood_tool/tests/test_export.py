@@ -0,0 +1,40 @@
+"""Test bulk result export module."""
+
+import numpy as np
+from pytest import importorskip, mark
+
+import flood_tool.export as export
+
+@mark.parametrize('name', ['results.npz', 'results'])
+def test_export_results(tool, tmp_path, name):
+    """Test exported results read back equal to the tool scores."""
+    path = str(tmp_path/name)
+    tool.export_results(path, chunksize=37)
+    results = export.read_results(path)
+
+    codes, cost, risk = tool.get_postcode_scores(tool.dfp['Postcode'])
+    assert list(results) == list(export.RESULT_COLUMNS)
+    assert (results['postcode'] == tool.dfp['Postcode'].to_numpy(dtype=str)).all()
+    assert (results['band'] == codes).all()
+    assert (results['cost'] == cost).all()
+    assert (results['risk'] == risk).all()
+
+    sorted_risk = tool.get_sorted_annual_flood_risk(tool.dfp['Postcode'])
+    assert list(results['postcode'][np.argsort(results['rank'])]) == list(sorted_risk.index)
+
+def test_export_parquet(tool, tmp_path):
+    """Test results round trip through Parquet."""
+    importorskip('pyarrow')
+    path = str(tmp_path/'results.parquet')
+    tool.export_results(path, chunksize=100)
+    results = export.read_results(path)
+    assert (results['rank'] == np.concatenate([c['rank'] for c in tool.iter_results()])).all()
+
+def test_iter_results_read_only(tool):
+    """Test result chunks cannot change the scores shared by the tool."""
+    chunk = next(tool.iter_results())
+    for name, column in chunk.items():
+        assert not column.flags.writeable, name
+
+    for array in tool._all_scores():
+        assert not array.flags.writeable
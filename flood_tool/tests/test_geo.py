@@ -81,3 +81,52 @@ def test_get_easting_northing_from_lat_long():
                                                            longitude)) \
                                      == approx(np.array((e,n)),
                                                rel=1.0e-5)
+
+def test_projection_table():
+    """Test ProjectionTable against the exact transform."""
+    rng = np.random.default_rng(49)
+    latitude = rng.uniform(49.9, 60.9, 10000)
+    longitude = rng.uniform(-8.6, 2.0, 10000)
+
+    exact = np.array(geo.get_easting_northing_from_lat_long(latitude, longitude))
+    fast = np.array(geo.get_easting_northing_from_lat_long(latitude, longitude,
+                                                           fast=True))
+    assert np.hypot(*(fast-exact)).max() <= 1.0
+
+    table = geo.ProjectionTable(tolerance=0.1)
+    assert table.max_error <= 0.1
+    fast = np.array(table(latitude, longitude))
+    assert np.hypot(*(fast-exact)).max() <= 0.1
+
+def test_projection_table_outside_bounds():
+    """Test ProjectionTable falls back to the exact transform outside its bounds."""
+    latitude = np.array([70.0, geo.deg(geo.rad(52, 39, 27.2531))])
+    longitude = np.array([-3.5, geo.deg(geo.rad(1, 43, 4.5177))])
+
+    exact = geo.get_easting_northing_from_lat_long(latitude, longitude)
+    fast = geo.get_easting_northing_from_lat_long(geo.rad(latitude),
+                                                  geo.rad(longitude),
+                                                  radians=True, fast=True)
+    assert fast[0][0] == exact[0][0] and fast[1][0] == exact[1][0]
+    assert np.array(fast) == approx(np.array(exact), abs=1.0)
+
+@mark.parametrize('latitude', [70.0, 52.0])
+def test_projection_table_scalars(latitude):
+    """Test the fast transform takes and returns the shapes of the exact one."""
+    exact = geo.get_easting_northing_from_lat_long(latitude, -1.0)
+    fast = geo.get_easting_northing_from_lat_long(latitude, -1.0, fast=True)
+
+    assert [e.shape for e in fast] == [e.shape for e in exact] == [(1,), (1,)]
+    assert np.array(fast) == approx(np.array(exact), abs=1.0)
+
+def test_get_easting_northing_float32():
+    """Test float32 projection stays within 0.5 m of float64."""
+    rng = np.random.default_rng(45)
+    latitude = rng.uniform(49.9, 60.9, 10000)
+    longitude = rng.uniform(-8.6, 2.0, 10000)
+
+    exact = np.array(geo.get_easting_northing_from_lat_long(latitude, longitude))
+    single = geo.get_easting_northing_from_lat_long(latitude, longitude,
+                                                    dtype=np.float32)
+    assert single[0].dtype == np.float32
+    assert np.hypot(*(np.array(single, dtype=np.float64)-exact)).max() <= 0.5
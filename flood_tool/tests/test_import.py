@@ -0,0 +1,70 @@
+"""Test package import time and deferred dependencies."""
+
+import subprocess
+import sys
+
+from pytest import mark
+
+# Budget, in seconds, for the cumulative import time of the package
+IMPORT_BUDGET = 1.0
+
+def import_times(statement):
+    """Run `statement` under `python -X importtime`, returning cumulative
+    import times in seconds keyed by module name."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                          capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)*1.0e-6
+    return times
+
+@mark.parametrize('statement', ['import flood_tool', 'import flood_tool.geo'])
+def test_import_defers_heavy_dependencies(statement):
+    """Test importing the package or geo needs only NumPy."""
+    times = import_times(statement)
+
+    assert 'numpy' in times
+    assert not {'pandas', 'scipy', 'matplotlib', 'requests'} & set(times)
+    assert times['flood_tool'] < IMPORT_BUDGET
+
+def run(statement):
+    """Run `statement` in a fresh interpreter, returning its output."""
+    return subprocess.run([sys.executable, '-c', statement], capture_output=True,
+                          text=True, check=True).stdout.strip()
+
+def test_lazy_attributes():
+    """Test names from tool and live load on first use."""
+    import flood_tool
+
+    assert 'Tool' in dir(flood_tool)
+    assert 'live' in dir(flood_tool)
+    assert flood_tool.Tool is flood_tool.tool.Tool
+    assert flood_tool.WarningRules is flood_tool.live.WarningRules
+    assert not hasattr(flood_tool, 'missing')
+
+def test_lazy_names_match_modules():
+    """Test the table of lazy names lists the submodules' exports."""
+    import flood_tool
+    import flood_tool.live
+    import flood_tool.tool
+
+    for module in flood_tool._LAZY_MODULES:
+        names = [name for name, source in flood_tool._LAZY_NAMES.items()
+                 if source == module]
+        assert names == getattr(flood_tool, module).__all__
+
+def test_lazy_submodules():
+    """Test submodules are attributes of a freshly imported package."""
+    assert run('import flood_tool; print(flood_tool.tool.Tool.__name__)') == 'Tool'
+    assert run('import flood_tool; print(flood_tool.live.__name__)') == 'flood_tool.live'
+    assert run('import sys, flood_tool; hasattr(flood_tool, "missing");'
+               ' print("pandas" in sys.modules)') == 'False'
+
+def test_star_import():
+    """Test star import exports the geo, tool and live names."""
+    assert run('from flood_tool import *; print(Tool.__name__, WarningRules.__name__,'
+               ' get_easting_northing_from_lat_long.__name__)') == \
+        'Tool WarningRules get_easting_northing_from_lat_long'
@@ -0,0 +1,254 @@
+"""Test live and historical data module."""
+
+import os
+
+import numpy as np
+import pandas as pd
+from pytest import approx, fixture
+
+import flood_tool.live as live
+
+HEADER = 'dateTime,date,measure,stationReference,parameter,value\n'
+
+def write_archive(directory, date, rows):
+    """Write a small readings-full style archive."""
+    with open(os.path.join(directory, live.archive_name(date)), 'w') as arch:
+        arch.write(HEADER)
+        for time, station, parameter, value in rows:
+            arch.write('%sT%sZ,%s,m,%s,%s,%s\n'%(date, time, date,
+                                                  station, parameter, value))
+
+@fixture
+def archive_dir(tmp_path):
+    """Directory of fixture archives for two days."""
+    write_archive(tmp_path, '2019-10-05',
+                  [('00:15:00', 'A', 'rainfall', 0.2),
+                   ('00:00:00', 'B', 'rainfall', 1.0),
+                   ('00:00:00', 'C', 'level', 3.0),
+                   ('00:30:00', 'A', 'rainfall', '0.2|0.4')])
+    write_archive(tmp_path, '2019-10-06',
+                  [('00:00:00', 'A', 'rainfall', 2.5),
+                   ('00:00:00', 'B', 'rainfall', 0.0)])
+    return str(tmp_path)
+
+def test_get_archive_day(archive_dir, tmp_path):
+    """Test get_archive_day parses and caches a day."""
+    cache_dir = str(tmp_path/'cache')
+    day = live.get_archive_day('2019-10-05', cache_dir, archive_dir)
+
+    assert list(day['station']) == ['A', 'B']
+    assert day['value'] == approx([0.2, 1.0])
+    assert day['time'][0] == np.datetime64('2019-10-05T00:15:00')
+    assert os.path.exists(os.path.join(cache_dir, 'rainfall-2019-10-05.npz'))
+
+    os.remove(os.path.join(archive_dir, live.archive_name('2019-10-05')))
+    cached = live.get_archive_day('2019-10-05', cache_dir, archive_dir)
+    assert list(cached['station']) == ['A', 'B']
+
+def test_historic_range(archive_dir, tmp_path):
+    """Test historic_range merges days in time order."""
+    readings = live.historic_range('2019-10-05', '2019-10-06',
+                                   cache_dir=str(tmp_path/'cache'),
+                                   archive_dir=archive_dir, workers=2)
+
+    assert readings.index.name == 'dateTime'
+    assert readings.index.is_monotonic_increasing
+    assert list(readings['station']) == ['B', 'A', 'A', 'B']
+    assert readings['value'].to_numpy() == approx([1.0, 0.2, 2.5, 0.0])
+
+def test_warning_rules():
+    """Test WarningRules against the step 3 warning table."""
+    rules = live.WarningRules()
+    bands = ['Zero', 'Very Low', 'Very Low', 'Low', 'Medium',
+             'Medium', 'Medium', 'High', 'High', 'Unknown']
+    rainfall = [10.0, 2.0, 3.5, 2.5, 1.0, 2.0, 3.5, 0.0, 2.5, 10.0]
+
+    levels = rules(bands, rainfall)
+    assert list(levels) == [0, 0, 1, 1, 0, 0, 2, 1, 2, 0]
+    assert list(rules([4, 3], np.nan)) == [1, 0]
+    assert live.WARNINGS[levels[-4]] == 'Red Warning, High Risk'
+
+    # boundaries of the table
+    bands = ['Very Low', 'Low', 'Medium', 'Medium', 'High']
+    assert list(rules(bands, [3.0, 2.0, 2.0, 3.0, 2.0])) == [0, 0, 0, 2, 2]
+    assert rules('High', 3.0) == 2
+    assert rules(3, 1.0) == 0
+
+def test_warning_rules_thresholds():
+    """Test WarningRules accepts custom thresholds."""
+    rules = live.WarningRules({'Low': (1.0, 1.5)})
+    assert list(rules([2, 2, 2], [0.5, 1.2, 2.0])) == [0, 1, 2]
+
+def readings(*rows):
+    """Readings dictionary from (station, time, value) rows."""
+    return {'station': np.array([r[0] for r in rows], dtype=str),
+            'time': np.array([r[1] for r in rows], dtype='datetime64[s]'),
+            'value': np.array([r[2] for r in rows], dtype=float)}
+
+def test_parse_readings():
+    """Test parse_readings extracts station references from measures."""
+    items = [{'measure': 'http://x/id/measures/E7050-rainfall-t-15_min-mm',
+              'dateTime': '2019-10-06T10:15:00Z', 'value': 0.4},
+             {'measure': 'http://x/id/measures/E7051-rainfall-t-15_min-mm',
+              'dateTime': '2019-10-06T10:15:00Z', 'value': [0.1, 0.2]}]
+    parsed = live.parse_readings(items)
+    assert list(parsed['station']) == ['E7050']
+    assert parsed['time'][0] == np.datetime64('2019-10-06T10:15:00')
+
+def test_warning_poller():
+    """Test WarningPoller reports only changed warnings."""
+    polls = [readings(('A', '2019-10-06T10:00', 1.0),
+                      ('B', '2019-10-06T10:00', 0.0)),
+             readings(('A', '2019-10-06T10:00', 1.0),
+                      ('A', '2019-10-06T10:15', 4.0),
+                      ('A', '2019-10-06T10:30', 2.5),
+                      ('Z', '2019-10-06T10:30', 9.0)),
+             readings()]
+    since = []
+
+    def fetch(last_time):
+        since.append(last_time)
+        return polls.pop(0)
+
+    poller = live.WarningPoller(['A', 'B'], [0, 0, 1, -1],
+                                ['Medium', 'Low', 'High', 'High'],
+                                postcodes=['P0', 'P1', 'P2', 'P3'],
+                                fetch=fetch)
+
+    first = poller.poll()
+    assert list(first['postcode']) == []
+
+    second = poller.poll()
+    assert list(second['postcode']) == ['P0', 'P1']
+    assert list(second['old']) == [0, 0]
+    assert list(second['new']) == [1, 1]
+    assert since[1] == np.datetime64('2019-10-06T10:00')
+    assert poller.stats['postcodes_recomputed'] == 5
+
+    third = poller.poll()
+    assert list(third['postcode']) == []
+    assert since[2] == np.datetime64('2019-10-06T10:30')
+    assert poller.stats['polls'] == 3
+
+def test_warning_poller_backoff():
+    """Test WarningPoller backs off after failed polls."""
+    def fetch(last_time):
+        raise IOError('no connection')
+
+    poller = live.WarningPoller(['A'], [0], ['High'], fetch=fetch,
+                                retry=10., max_backoff=25.)
+    delays = []
+    poller.sleep = delays.append
+    poller.run(print, cycles=4)
+
+    assert delays == [10., 20., 25., 25.]
+    assert poller.stats['errors'] == 4
+
+def test_interpolate_rainfall():
+    """Test interpolate_rainfall inverse distance weighting."""
+    station_e = np.array([0.0, 100.0, 5000.0, 50.0])
+    station_n = np.array([0.0, 0.0, 0.0, 0.0])
+    values = np.array([1.0, 3.0, 10.0, np.nan])
+
+    rain = live.interpolate_rainfall(station_e, station_n, values,
+                                     [50.0, 0.0, 25.0, 1.0e6],
+                                     [0.0, 0.0, 0.0, 0.0],
+                                     k=3, radius=1000.)
+
+    assert rain[0] == approx(2.0)
+    assert rain[1] == approx(1.0)
+    assert rain[2] == approx((1.0/25**2+3.0/75**2)/(1.0/25**2+1.0/75**2))
+    assert np.isnan(rain[3])
+
+def test_rainfall_buffer():
+    """Test RainfallBuffer rolling sums against direct sums."""
+    rng = np.random.default_rng(6)
+    slots = rng.random((250, 3))
+    rain = live.RainfallBuffer(3, {'short': 4, 'long': 10})
+
+    for i, row in enumerate(slots):
+        rain.push(row)
+        assert rain.accumulation('short') == approx(slots[max(0, i-3):i+1].sum(axis=0))
+        assert rain.accumulation('long') == approx(slots[max(0, i-9):i+1].sum(axis=0))
+
+    rain.push([2.0, np.nan], stations=[2, 0])
+    assert rain.accumulation('short') == approx(slots[-3:].sum(axis=0)+[0, 0, 2])
+
+def test_detect_events():
+    """Test detect_events finds and merges runs above threshold."""
+    values = np.array([[0.0, 5.0, 6.0, 0.0, 0.0, 7.0, 0.0, 0.0],
+                       [0.0, 0.0, 4.0, 4.0, 0.0, 0.0, 0.0, 0.0],
+                       [np.nan, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 9.0]])
+
+    events = live.detect_events(values, 3.0, stations=['A', 'B', 'C'])
+    assert list(events['station']) == ['A', 'B', 'A', 'C']
+    assert list(events['start']) == [1, 2, 5, 7]
+    assert list(events['end']) == [2, 3, 5, 7]
+    assert events['peak'].to_numpy() == approx([6.0, 4.0, 7.0, 9.0])
+    assert events['total'].to_numpy() == approx([11.0, 8.0, 7.0, 9.0])
+
+    merged = live.detect_events(values, 3.0, stations=['A', 'B', 'C'],
+                                station_easting=[0.0, 100.0, 5.0e4],
+                                station_northing=[0.0, 0.0, 0.0],
+                                distance=1000.0, gap=2)
+    assert list(merged['station']) == ['A', 'C']
+    assert list(merged['stations']) == [2, 1]
+    assert list(merged['end']) == [5, 7]
+    assert merged['total'].to_numpy() == approx([26.0, 9.0])
+
+    rolling = live.detect_events(values, 9.0, window=2)
+    assert list(rolling['start']) == [2]
+    assert rolling['peak'].to_numpy() == approx([11.0])
+    assert rolling['total'].to_numpy() == approx([11.0])
+
+    rolling = live.detect_events([[0.0, 5.0, 5.0, 0.0, 4.0, 4.0]], 6.0, window=2, gap=2)
+    assert list(rolling['start']) == [2]
+    assert rolling['peak'].to_numpy() == approx([10.0])
+    assert rolling['total'].to_numpy() == approx([18.0])
+
+def test_reading_cube(archive_dir, tmp_path):
+    """Test ReadingCube lays readings out by station and slot."""
+    readings = live.historic_range('2019-10-05', '2019-10-06',
+                                   cache_dir=str(tmp_path/'cache'),
+                                   archive_dir=archive_dir)
+    cube = live.ReadingCube.from_readings(readings)
+
+    assert list(cube.stations) == ['A', 'B']
+    assert cube.times[0] == np.datetime64('2019-10-05T00:00:00')
+    assert cube.values.shape == (2, 97)
+    assert cube.mask.sum() == 4
+    assert cube.values[:, [0, 1, 96]] == approx(np.array([[np.nan, 0.2, 2.5],
+                                                          [1.0, np.nan, 0.0]]),
+                                                nan_ok=True)
+    assert list(cube.rows(['B', 'Z'])) == [1, -1]
+    assert cube.station_totals() == approx([2.7, 1.0])
+    assert cube.slot_means()[[0, 96]] == approx([1.0, 1.25])
+
+    times, totals = cube.accumulate(4)
+    assert times[1] == np.datetime64('2019-10-05T01:00:00')
+    assert totals[:, 0] == approx([0.2, 1.0])
+    assert np.isnan(totals[:, 1]).all()
+
+    events = cube.events(2.0)
+    assert list(events['station']) == ['A']
+    assert events['start'].iloc[0] == pd.Timestamp('2019-10-06')
+
+    day = live.ReadingCube.from_readings({'station': np.array(['A', 'A']),
+                                          'time': np.array(['2019-10-05T00:05:00Z',
+                                                            '2019-10-05T00:10:00Z']),
+                                          'value': np.array([1.0, 3.0])},
+                                         start='2019-10-05')
+    assert day.values[0, 0] == 3.0
+
+    day = live.ReadingCube.from_readings({'station': np.array(['A', 'A', 'A']),
+                                          'time': np.array(['2019-10-05T00:10:00Z',
+                                                            '2019-10-05T00:05:00Z',
+                                                            '2019-10-05T00:10:00Z']),
+                                          'value': np.array([1.0, 3.0, 2.0])})
+    assert day.values[0, 0] == 2.0
+
+    empty = {'station': np.zeros(0, dtype=str), 'time': np.zeros(0, dtype='datetime64[s]'),
+             'value': np.zeros(0)}
+    assert live.ReadingCube.from_readings(empty).values.shape == (0, 0)
+    assert live.ReadingCube.from_readings(empty, '2019-10-05',
+                                          '2019-10-05T01:00').values.shape == (0, 5)
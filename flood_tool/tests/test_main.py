@@ -0,0 +1,69 @@
+"""Test the command line interface."""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+from pytest import approx, mark
+
+from flood_tool import __main__ as cli
+
+def test_read_postcodes():
+    """Test read_postcodes on csv and newline delimited input."""
+    assert list(cli.read_postcodes(['ME160FN,CT147DB,ME139BY'])) \
+        == ['ME160FN', 'CT147DB', 'ME139BY']
+    assert list(cli.read_postcodes(['Postcode,Value\n', 'ME16 0FN,1\n',
+                                    'CT14 7DB,2\n'])) == ['ME16 0FN', 'CT14 7DB']
+    assert list(cli.read_postcodes(['ME160FN\n', '\n', ' CT147DB \n'])) \
+        == ['ME160FN', 'CT147DB']
+
+@mark.parametrize('workers', [1, 2])
+def test_main(tool, tool_files, tmp_path, workers):
+    """Test the command line scores postcodes like Tool."""
+    postcodes = list(tool.dfp['Postcode'][:25])
+    infile = tmp_path/'input.txt'
+    infile.write_text('\n'.join([p.lower() for p in postcodes]+['XX9 9XX'])+'\n')
+    outfile = tmp_path/'scores.csv'
+    cache = tmp_path/'tool.pkl'
+
+    cli.main([str(infile), '-o', str(outfile), '-j', str(workers), '-c', '7',
+              '--cache', str(cache), '--postcode-file', tool_files[0],
+              '--risk-file', tool_files[1], '--values-file', tool_files[2]])
+
+    scores = pd.read_csv(outfile, keep_default_na=False, na_values=['nan'])
+    easting_northing = tool.get_easting_northing(postcodes)
+    bands = tool.get_easting_northing_flood_probability(*easting_northing.T)
+
+    assert cache.exists()
+    assert list(scores['Postcode']) == postcodes+['XX9 9XX']
+    assert list(scores['Probability Band']) == list(bands)+['']
+    assert scores['Flood Cost'][:-1].to_numpy() == approx(tool.get_flood_cost(postcodes))
+    assert scores['Flood Risk'][:-1].to_numpy() == approx(np.asarray(tool.get_annual_flood_risk(postcodes, bands)))
+    assert np.isnan(scores['Flood Risk'].iloc[-1])
+
+def test_load_tool_rebuilds_stale_cache(tool, tool_files, tmp_path):
+    """Test load_tool replaces caches which do not match its inputs."""
+    cache = tmp_path/'tool.pkl'
+    tool.save(cache, ['stale']*3)
+
+    loaded = cli.load_tool(*tool_files, cache=str(cache))
+    postcodes = list(tool.dfp['Postcode'][:5])
+    assert loaded.get_lat_long(postcodes) == approx(tool.get_lat_long(postcodes))
+
+    with open(cache, 'rb') as infile:
+        assert pickle.load(infile)['digests'] != ['stale']*3
+
+def test_main_binary(tool, tool_files, tmp_path):
+    """Test the command line binary output."""
+    postcodes = list(tool.dfp['Postcode'][:10])
+    infile = tmp_path/'input.csv'
+    infile.write_text(','.join(postcodes)+'\n')
+    outfile = tmp_path/'scores.bin'
+
+    cli.main([str(infile), '-o', str(outfile), '-f', 'binary',
+              '--postcode-file', tool_files[0],
+              '--risk-file', tool_files[1], '--values-file', tool_files[2]])
+
+    scores = np.fromfile(outfile, dtype=cli.RECORD_DTYPE)
+    assert list(scores['postcode']) == postcodes
+    assert scores['cost'] == approx(tool.get_flood_cost(postcodes))
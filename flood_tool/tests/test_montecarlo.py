@@ -0,0 +1,40 @@
+"""Test Monte Carlo loss simulation module."""
+
+import numpy as np
+from pytest import approx
+
+import flood_tool.montecarlo as montecarlo
+
+def test_loss_statistics():
+    """Test merged streaming statistics against direct calculation."""
+    rng = np.random.default_rng(2)
+    losses = rng.lognormal(10.0, 1.0, 5000)
+    losses[::4] = 0.0
+
+    stats = montecarlo.LossStatistics(losses.max())
+    for chunk in np.array_split(losses, 7):
+        stats.update(chunk)
+
+    assert stats.count == len(losses)
+    assert stats.mean == approx(losses.mean())
+    assert stats.variance == approx(losses.var(ddof=1))
+    assert stats.min == 0.0
+    assert stats.max == losses.max()
+    assert stats.quantile([0.1, 0.5, 0.99]) == approx(np.quantile(losses, [0.1, 0.5, 0.99]),
+                                                      rel=0.01, abs=1.0)
+
+def test_simulate_losses():
+    """Test simulations are reproducible and match the expected loss."""
+    probabilities = np.array([0.1, 0.02, 0.5, 0.0])
+    losses = np.array([1000.0, 50000.0, 10.0, 1.0e9])
+
+    stats = montecarlo.simulate_losses(probabilities, losses, years=40000, seed=1,
+                                       chunk_elements=10000)
+    expected = (probabilities*losses).sum()
+    assert stats.mean == approx(expected, rel=0.1)
+    assert stats.max <= 51010.0
+
+    parallel = montecarlo.simulate_losses(probabilities, losses, years=40000, seed=1,
+                                          workers=2, chunk_elements=10000)
+    assert parallel.mean == stats.mean
+    assert (parallel.counts == stats.counts).all()
@@ -0,0 +1,102 @@
+"""Test the local query server."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen, Request
+
+from pytest import approx, fixture, raises
+
+from flood_tool.server import MicroBatcher, ToolServer
+
+def test_micro_batcher():
+    """Test MicroBatcher coalesces concurrent calls."""
+    calls = []
+
+    def double(items):
+        calls.append(len(items))
+        return [2*item for item in items]
+
+    batcher = MicroBatcher(double, window=0.05)
+    futures = [batcher.submit(range(i, i+3)) for i in range(10)]
+
+    assert [f.result() for f in futures] == [[2*i, 2*i+2, 2*i+4] for i in range(10)]
+    assert sum(calls) == 30 and len(calls) < 10
+    assert batcher.metrics()['requests'] == 10
+    batcher.close()
+
+def test_micro_batcher_errors():
+    """Test MicroBatcher passes errors to the caller."""
+    def fail(items):
+        raise KeyError('bad')
+
+    batcher = MicroBatcher(fail, window=0.0)
+    with raises(KeyError):
+        batcher([1])
+    batcher.close()
+
+def test_micro_batcher_isolates_errors():
+    """Test a failing request does not fail the others in its batch."""
+    def check(items):
+        if any(item < 0 for item in items):
+            raise ValueError('negative')
+        return items
+
+    batcher = MicroBatcher(check, window=0.05)
+    futures = [batcher.submit(items) for items in ([1], [-1, 2], [3])]
+
+    assert futures[0].result() == [1]
+    assert isinstance(futures[1].exception(), ValueError)
+    assert futures[2].result() == [3]
+    batcher.close()
+
+@fixture
+def server(tool):
+    """Query server on a free localhost port."""
+    server = ToolServer(tool, window=0.02)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://%s:%d'%server.server_address
+    server.shutdown()
+    server.server_close()
+
+def query(url, postcodes):
+    """POST a query, returning the decoded reply."""
+    data = json.dumps({'postcodes': postcodes}).encode()
+    with urlopen(Request(url+'/query', data=data)) as reply:
+        return json.loads(reply.read())['results']
+
+def test_server(server, tool):
+    """Test concurrent queries against direct Tool calls."""
+    postcodes = list(tool.dfp['Postcode'][:40])
+
+    with ThreadPoolExecutor(8) as pool:
+        replies = list(pool.map(lambda p: query(server, [p, 'XX9 9XX']), postcodes))
+
+    lat_long = tool.get_lat_long(postcodes)
+    codes, cost, risk = tool.get_postcode_scores(postcodes)
+    for reply, ll, c, r in zip(replies, lat_long, cost, risk):
+        assert [reply[0]['latitude'], reply[0]['longitude']] == approx(ll)
+        assert reply[0]['cost'] == approx(c)
+        assert reply[0]['risk'] == approx(r)
+        assert reply[1]['band'] is None and reply[1]['latitude'] is None
+
+    with urlopen(server+'/metrics') as reply:
+        metrics = json.loads(reply.read())
+    assert metrics['requests'] == 40
+    assert metrics['batches'] < 40
+    assert metrics['batch_size']['max'] > 2
+
+def test_server_bad_requests(server, tool):
+    """Test malformed queries are rejected without failing good ones."""
+    postcode = tool.dfp['Postcode'][0]
+
+    with ThreadPoolExecutor(2) as pool:
+        good = pool.submit(query, server, [postcode])
+        for body in ([['a', 'b']], 5, None):
+            with raises(HTTPError) as err:
+                query(server, body)
+            assert err.value.code == 400
+
+    assert good.result()[0]['postcode'] == postcode
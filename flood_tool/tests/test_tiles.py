@@ -0,0 +1,47 @@
+"""Test flood band and risk tile pyramid module."""
+
+import numpy as np
+from pytest import approx
+
+import flood_tool.tiles as tiles
+
+def test_build_pyramid(tmp_path):
+    """Test pyramid levels against direct binning of the locations."""
+    rng = np.random.default_rng(47)
+    easting = rng.uniform(0, 5000, 500)
+    northing = rng.uniform(0, 3000, 500)
+    codes = rng.integers(0, 5, 500)
+    risk = rng.random(500)
+
+    pyramid = tiles.build_pyramid(str(tmp_path), easting, northing, codes, risk,
+                                  cell=100., levels=4, tile_size=8,
+                                  bounds=(0., 0., 5000., 3000.))
+    pyramid = tiles.TilePyramid(str(tmp_path))
+    assert pyramid.levels == 4
+    assert pyramid.shapes[0] == (30, 50)
+
+    for level in range(pyramid.levels):
+        size = pyramid.cell_size(level)
+        band, cell_risk = pyramid.level(level)
+        row, column = (northing//size).astype(int), (easting//size).astype(int)
+        expected = np.full(band.shape, -1)
+        np.maximum.at(expected, (row, column), codes)
+        assert np.array_equal(band, expected)
+        assert cell_risk.sum() == approx(risk.sum())
+        assert cell_risk[row[0], column[0]] == approx(risk[(row == row[0]) & (column == column[0])].sum())
+
+    tile_row, tile_column = pyramid.tile_at(0, easting[0], northing[0])
+    band, _ = pyramid.tile(0, tile_row, tile_column)
+    assert band[int(northing[0]//100) % 8, int(easting[0]//100) % 8] >= codes[0]
+
+def test_empty_tiles(tmp_path):
+    """Test tiles without locations are not stored."""
+    pyramid = tiles.build_pyramid(str(tmp_path), [50.], [50.], [3], [2.],
+                                  cell=10., levels=2, tile_size=4,
+                                  bounds=(0., 0., 80., 80.))
+    assert pyramid.tiles(0) == (2, 2)
+    assert len(pyramid._band[0]) == 1
+    band, risk = pyramid.tile(0, 0, 0)
+    assert (band == -1).all() and (risk == 0).all()
+    band, risk = pyramid.tile(0, 1, 1)
+    assert band[1, 1] == 3 and risk.sum() == 2.
@@ -0,0 +1,365 @@
+"""Test flood risk tool module."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pytest import approx, raises
+
+import flood_tool.tool as tool
+from flood_tool.tool import BANDS, BAND_PROBABILITIES, Tool, band_codes, load_zones
+
+RESOURCES = os.sep.join((os.path.dirname(__file__), '..', 'resources'))
+SCORE_PATH = os.sep.join((os.path.dirname(__file__), '..', '..', 'score'))
+
+def test_band_codes():
+    """Test band_codes function"""
+    assert list(tool.band_codes(['High', 'Medium', 'Low', 'Very Low', 'Zero']))\
+        == [4, 3, 2, 1, 0]
+    assert list(tool.band_codes(np.array(['Bogus', 'Zero']))) == [-1, 0]
+
+def test_normalize_postcodes():
+    """Test normalize_postcodes function"""
+    assert list(tool.normalize_postcodes(['me16 0fn', 'DA99FD', 'N1 6AB'])) \
+        == ['ME160FN', 'DA9 9FD', 'N1  6AB']
+
+def test_save_load(tool, tmp_path):
+    """Test Tool save and load round trip."""
+    from flood_tool import Tool
+
+    tool.save(tmp_path/'tool.pkl')
+    loaded = Tool.load(tmp_path/'tool.pkl')
+
+    postcodes = list(tool.dfp['Postcode'][:5])
+    assert loaded.get_lat_long(postcodes) == approx(tool.get_lat_long(postcodes))
+    assert loaded.get_easting_northing(postcodes) \
+        == approx(tool.dfp[['Easting', 'Northing']][:5].to_numpy())
+
+def test_load_checks_cache(tool, tmp_path):
+    """Test Tool.load rejects caches of other inputs or versions."""
+    import pickle
+
+    from flood_tool import Tool
+
+    tool.save(tmp_path/'tool.pkl', ['a', 'b', 'c'])
+    assert Tool.load(tmp_path/'tool.pkl', ['a', 'b', 'c'])._postcodes.size
+    with raises(ValueError):
+        Tool.load(tmp_path/'tool.pkl', ['a', 'b', 'd'])
+
+    with open(tmp_path/'old.pkl', 'wb') as cache:
+        pickle.dump({name: value for name, value in tool.__dict__.items()
+                     if name != '_cache_lock'}, cache)
+    with raises(ValueError):
+        Tool.load(tmp_path/'old.pkl')
+
+def test_prepared_arrays_read_only(tool):
+    """Test the arrays shared between queries can't be modified."""
+    with raises(ValueError):
+        tool._easting[0] = 0.0
+    with raises(ValueError):
+        tool._zone_code[0] = 4
+
+def test_concurrent_queries(tool):
+    """Test a shared Tool gives the same answers from many threads."""
+    postcodes = list(tool.dfp['Postcode'])
+    easting, northing = tool.dfp['Easting'].to_numpy(), tool.dfp['Northing'].to_numpy()
+    expected = (tool.get_lat_long(postcodes),
+                tool.get_easting_northing_flood_probability(easting, northing),
+                tool.get_sorted_annual_flood_risk(postcodes))
+
+    def query(i):
+        return (tool.get_lat_long(postcodes),
+                tool.get_easting_northing_flood_probability(easting, northing),
+                tool.get_sorted_annual_flood_risk(postcodes))
+
+    with ThreadPoolExecutor(8) as pool:
+        for lat_long, bands, risk in pool.map(query, range(32)):
+            assert np.array_equal(lat_long, expected[0])
+            assert np.array_equal(bands, expected[1])
+            assert risk.equals(expected[2])
+
+def test_concurrent_rollups(tool):
+    """Test shared results are computed once for concurrent queries."""
+    loaded = Tool.__new__(Tool)
+    loaded.__dict__.update(tool.__dict__)
+    loaded.refresh()
+    calls = []
+    row_scores = loaded._row_scores
+
+    def counted(rows):
+        calls.append(len(rows))
+        return row_scores(rows)
+
+    loaded._row_scores = counted
+    with ThreadPoolExecutor(8) as pool:
+        tables = list(pool.map(lambda i: loaded.get_risk_rollup('sector'), range(16)))
+
+    assert len(calls) == 1
+    assert all(table.equals(tables[0]) for table in tables)
+    assert tables[0].equals(tool.get_risk_rollup('sector'))
+
+def test_classify_cascade(tool):
+    """Test cascade classification matches testing every zone."""
+    rng = np.random.default_rng(10)
+    easting = tool.dfp['Easting'].to_numpy()[:200]+rng.normal(0, 1000, 200)
+    northing = tool.dfp['Northing'].to_numpy()[:200]+rng.normal(0, 1000, 200)
+
+    codes, resolved = tool.classify_cascade(easting, northing)
+    assert sum(resolved.values()) == 200
+    assert resolved['High'] == (codes == 4).sum()
+
+    tool.cascade = False
+    try:
+        brute = tool.get_easting_northing_flood_probability(easting, northing)
+    finally:
+        del tool.cascade
+    assert np.array_equal(BANDS[codes], brute)
+    assert (codes > 0).any() and (codes == 0).any()
+
+def test_classify_zone_edges(tool):
+    """Test locations exactly on the edge of each band's largest zone are
+    inside it, with or without the cascade."""
+    edges = Tool.__new__(Tool)
+    edges.__dict__.update(tool.__dict__)
+    edges.dff = pd.DataFrame({'X': [500000.0, 510000.0], 'Y': [200000.0, 200000.0],
+                              'radius': [300.0, 100.0], 'prob_4band': ['Low', 'High']})
+    edges.refresh()
+    easting = np.array([500300.0, 510000.0])
+    northing = np.array([200000.0, 200100.0])
+
+    cascade = edges.get_easting_northing_flood_probability(easting, northing)
+    edges.cascade = False
+    brute = edges.get_easting_northing_flood_probability(easting, northing)
+    assert list(cascade) == list(brute) == ['Low', 'High']
+
+def test_float32_classification(tool):
+    """Test float32 zone tests match float64 ones at zone edges."""
+    rng = np.random.default_rng(45)
+    zones = rng.integers(0, len(tool.dff), 2000)
+    angle = rng.uniform(0, 2*np.pi, 2000)
+    # distances from the centres within a few millimetres of the radii
+    distance = np.sqrt(tool._zone_r2[zones]) + rng.uniform(-0.005, 0.005, 2000)
+    easting = tool._zone_x[zones] + distance*np.cos(angle)
+    northing = tool._zone_y[zones] + distance*np.sin(angle)
+
+    tool.cascade = False
+    try:
+        exact = tool.get_easting_northing_flood_probability(easting, northing)
+        tool.dtype = np.float32
+        single = tool.get_easting_northing_flood_probability(easting, northing)
+    finally:
+        del tool.cascade
+        del tool.dtype
+    assert np.array_equal(single, exact)
+
+def test_zone_index_many_candidates():
+    """Test ZoneIndex finds containing zones beyond the first k candidates."""
+    x = np.concatenate((np.linspace(0, 10, 20), [500.0]))
+    radius = np.concatenate((np.full(20, 1.0), [1000.0]))
+    index = tool.ZoneIndex(x, np.zeros(21), radius)
+
+    assert list(index.contains(np.array([300.0, 5.0, 2000.0]),
+                               np.zeros(3), k=2)) == [True, True, False]
+
+def test_postcodes_within_radius(tool):
+    """Test postcodes_within_radius against direct distances."""
+    easting = tool.dfp['Easting'].to_numpy()
+    northing = tool.dfp['Northing'].to_numpy()
+
+    found = tool.postcodes_within_radius(easting[:3], northing[:3], [2000.0, 5000.0, 0.0])
+    for query in range(3):
+        radius = [2000.0, 5000.0, 0.0][query]
+        near = np.hypot(easting-easting[query], northing-northing[query]) <= radius
+        assert list(found.loc[found['Query'] == query, 'Postcode']) \
+            == sorted(tool.dfp['Postcode'][near])
+
+    codes, cost, risk = tool.get_postcode_scores(found['Postcode'])
+    assert list(found['Probability Band']) == list(BANDS[codes])
+    assert found['Flood Risk'].to_numpy() == approx(risk)
+
+def test_postcodes_in_bbox(tool):
+    """Test postcodes_in_bbox against direct comparisons."""
+    easting = tool.dfp['Easting'].to_numpy()
+    northing = tool.dfp['Northing'].to_numpy()
+    box = (easting[0]-3000, northing[0]-1000, easting[0]+2000, northing[0]+4000)
+
+    found = tool.postcodes_in_bbox(*box)
+    inside = ((easting >= box[0]) & (northing >= box[1])
+              & (easting <= box[2]) & (northing <= box[3]))
+    assert list(found['Postcode']) == sorted(tool.dfp['Postcode'][inside])
+    assert set(found['Query']) == {0}
+
+def test_postcodes_in_zone(tool):
+    """Test postcodes_in_zone finds postcodes in each zone's band or higher."""
+    found = tool.postcodes_in_zone([0, 1, 2])
+    assert set(found['Query']) <= {0, 1, 2} and len(found)
+
+    codes = tool.get_postcode_scores(found['Postcode'])[0]
+    zone_codes = band_codes(tool.dff['prob_4band'].to_numpy()[found['Query']])
+    assert (codes >= zone_codes).all()
+
+def test_risk_rollup(tool):
+    """Test risk rollups against a pandas groupby."""
+    codes, cost, risk = tool.get_postcode_scores(tool.dfp['Postcode'])
+    frame = pd.DataFrame({'district': tool.dfp['Postcode'].str[:4].str.strip(),
+                          'cost': cost, 'risk': risk, 'band': BANDS[codes]})
+    expected = frame.groupby('district').agg({'cost': 'sum', 'risk': 'sum'})
+
+    rollup = tool.get_risk_rollup('district')
+    assert list(rollup.index) == list(expected.index)
+    assert rollup['Flood Cost'].to_numpy() == approx(expected['cost'].to_numpy())
+    assert rollup['Flood Risk'].to_numpy() == approx(expected['risk'].to_numpy())
+    assert rollup[list(BANDS)].to_numpy().sum(axis=1).tolist() == rollup['Postcodes'].tolist()
+    assert rollup['High'].sum() == (codes == 4).sum()
+
+    sectors = tool.get_sorted_risk_rollup('sector')
+    assert sectors['Flood Risk'].is_monotonic_decreasing
+    assert sectors.index.name == 'sector' and ' ' in sectors.index[0]
+    assert tool.get_risk_rollup('area')['Flood Risk'].sum() == approx(risk.sum())
+
+def test_read_inputs(tool_files, tmp_path):
+    """Test read_inputs types, columns and validation."""
+    frames, times = tool.read_inputs(*tool_files)
+
+    assert set(times) == {'postcode_file', 'risk_file', 'values_file'}
+    assert list(frames['values_file'].columns) == ['Postcode', 'Total Value']
+    assert frames['risk_file']['radius'].dtype == np.float64
+
+    bad = tmp_path/'bad_risk.csv'
+    bad.write_text('X,Y,radius,prob_4band\n1.0,2.0,3.0,Severe\n')
+    with raises(ValueError, match='Severe'):
+        tool.read_inputs(tool_files[0], str(bad), tool_files[2])
+
+    bad.write_text('X,Y,prob_4band\n1.0,2.0,High\n')
+    with raises(ValueError, match='bad_risk.csv'):
+        tool.read_inputs(tool_files[0], str(bad), tool_files[2])
+
+def test_scenario_risk(tool):
+    """Test scenario risks against the single scenario calculation."""
+    codes, cost, risk = tool.get_postcode_scores(tool.dfp['Postcode'])
+
+    probabilities = np.vstack((BAND_PROBABILITIES, 2*BAND_PROBABILITIES))
+    scenarios = tool.get_scenario_risk(impact=[0.05, 0.1],
+                                       probabilities=probabilities,
+                                       value_multiplier=[1.0, 2.0],
+                                       chunksize=17)
+    assert scenarios.shape == (2, len(tool.dfp))
+    assert scenarios[0] == approx(risk)
+    assert scenarios[1] == approx(8*risk)
+
+    deltas = tool.get_scenario_ranking_deltas(scenarios)
+    assert (deltas['Scenario 0'] == 0).all()
+    assert (deltas['Scenario 1'] == 0).all()
+    sorted_risk = tool.get_sorted_annual_flood_risk(tool.dfp['Postcode'])
+    assert list(deltas.sort_values('Baseline Rank').index) == list(sorted_risk.index)
+
+    flat = tool.get_scenario_risk(probabilities=[0, 0.1, 0.1, 0.1, 0.1])
+    flat_deltas = tool.get_scenario_ranking_deltas(np.vstack((scenarios[0], flat[0])))
+    assert flat_deltas['Scenario 1'].abs().sum() > 0
+
+def test_simulate_annual_losses(tool):
+    """Test simulated annual losses against the expected annual risk."""
+    groups, probabilities, losses = tool.get_loss_groups()
+    codes, cost, risk = tool.get_postcode_scores(tool.dfp['Postcode'])
+
+    assert ((groups >= 0) == (codes > 0)).all()
+    assert (probabilities*losses).sum() == approx(np.nansum(risk))
+
+    stats = tool.simulate_annual_losses(years=20000, seed=3)
+    assert stats.count == 20000
+    assert stats.mean == approx(np.nansum(risk), rel=4*stats.std/np.sqrt(20000)/stats.mean)
+    assert stats.max <= losses.sum()
+
+def test_flood_cost_and_risk_arrays(tool):
+    """Test the array flood cost and risk paths against the postcode methods."""
+    postcodes = list(tool.dfp['Postcode'][:20]) + ['XX9 9XX']
+    values = tool.dfp['Total Value'].to_numpy()[:20]
+    bands = ['High', 'Zero', 'Low', 'Very Low', 'Medium']*4 + ['High']
+
+    cost = tool.get_flood_cost(postcodes)
+    assert isinstance(cost, np.ndarray)
+    assert cost[:-1] == approx(values)
+    assert cost[-1] == 0.0
+
+    risk = tool.get_annual_flood_risk(postcodes, bands)
+    assert risk.dtype == np.float64
+    assert risk[:-1] == approx(values*BAND_PROBABILITIES[band_codes(bands[:-1])]*0.05)
+    assert risk[-1] == 0.0
+    assert np.isnan(tool.get_annual_flood_risk(postcodes[:1], ['Severe'])[0])
+
+    rows = np.arange(20)
+    assert tool.annual_flood_risk_from_codes(rows, band_codes(bands[:-1])) == approx(risk[:-1])
+    assert np.isnan(tool.flood_cost_from_rows(np.array([-1]))[0])
+
+def test_flood_cost_and_risk_scoring_data(tool_files, tmp_path):
+    """Test flood costs and risks of scoring data postcodes in any format,
+    including ones not in the postcode file."""
+    testdb = pd.read_csv(os.sep.join((SCORE_PATH, 'test_data.csv'))).iloc[473:500]
+    values = testdb.loc[testdb['Flood Cost'] > 0, ['Postcode', 'Flood Cost']]
+    values = values.rename(columns={'Flood Cost': 'Total Value'})
+    values['Number Properties'] = 1
+    values.to_csv(tmp_path/'property_value.csv', index=False)
+    scored = Tool(os.sep.join((RESOURCES, 'postcodes.csv')), tool_files[1],
+                  str(tmp_path/'property_value.csv'))
+
+    postcodes = testdb['Postcode'].to_numpy()
+    assert scored.get_flood_cost(postcodes) == approx(testdb['Flood Cost'].to_numpy())
+    assert scored.get_annual_flood_risk(postcodes, testdb['Probability Band'].to_numpy()) \
+        == approx(testdb['Flood Risk'].to_numpy())
+
+def test_zone_file(tool, tool_files, tmp_path):
+    """Test zone files are written, mapped on reload and keyed by risk file."""
+    zone_file = str(tmp_path/'zones.bin')
+    Tool(*tool_files, zone_file=zone_file)
+    mapped = Tool(*tool_files, zone_file=zone_file)
+
+    assert isinstance(mapped._zone_r2.base, np.memmap)
+    easting, northing = tool.dfp['Easting'].to_numpy(), tool.dfp['Northing'].to_numpy()
+    assert np.array_equal(mapped.classify_cascade(easting, northing)[0],
+                          tool.classify_cascade(easting, northing)[0])
+    assert np.array_equal(mapped._zone_code, tool._zone_code)
+
+    zones = load_zones(zone_file)
+    assert np.array_equal(zones['r2'], tool._zone_r2)
+    with raises(ValueError, match='different flood probability file'):
+        load_zones(zone_file, digest='0'*64)
+
+def test_build_tile_pyramid(tool, tmp_path):
+    """Test the tile pyramid totals match the postcode risks."""
+    pyramid = tool.build_tile_pyramid(str(tmp_path), cell=5000., levels=3)
+    codes, _, risk = tool.get_postcode_scores(tool.dfp['Postcode'])
+    for level in range(3):
+        band, cell_risk = pyramid.level(level)
+        assert cell_risk.sum() == approx(risk.sum())
+        assert band.max() == codes.max()
+
+def test_postcodes_with_prefix(tool):
+    """Test prefix and range lookups against a scan of all postcodes."""
+    postcodes = tool.dfp['Postcode'].to_numpy(dtype=str)
+    first = postcodes[0]
+    district, sector = first[:4].rstrip(), first[:4]+' '+first[4]
+
+    found = tool.postcodes_with_prefix([district, sector, 'ZZ99'])
+    assert list(found.columns) == ['Query', 'Postcode', 'Latitude', 'Longitude',
+                                   'Probability Band', 'Flood Cost', 'Flood Risk']
+    assert list(found['Postcode'][found['Query'] == 0]) == \
+        sorted(p for p in postcodes if p.startswith(district))
+    assert list(found['Postcode'][found['Query'] == 1]) == \
+        sorted(p for p in postcodes if p.startswith(first[:5]))
+    assert (found['Query'] != 2).all()
+    assert found['Latitude'].to_numpy() == approx(tool.get_lat_long(found['Postcode'])[:, 0])
+
+    ordered = np.sort(postcodes)
+    in_range = tool.postcodes_in_range(ordered[3], ordered[10])
+    assert list(in_range['Postcode']) == list(ordered[3:11])
+
+def test_suggest_postcodes(tool):
+    """Test suggestions share the longest prefix with invalid postcodes."""
+    postcodes = np.sort(tool.dfp['Postcode'].to_numpy(dtype=str))
+    typo = postcodes[5][:6] + ('Z' if postcodes[5][6] != 'Z' else 'A')
+
+    suggested = tool.suggest_postcodes([postcodes[5], typo, 'a'])
+    assert suggested[0] == postcodes[5]
+    assert suggested[1][:6] == typo[:6]
+    assert suggested[2] == postcodes[0]
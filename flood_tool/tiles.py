@@ -0,0 +1,206 @@
+"""Multi-resolution tiles of flood probability bands and annual flood risk.
+
+A pyramid covers the OS grid with square cells, holding the highest band
+code of the postcodes in each cell (-1 for cells without postcodes) and
+their summed annual flood risk. Level 0 has the finest cells, and each
+coarser level halves the resolution, reducing 2x2 blocks of the level
+below by their maximum band and summed risk.
+
+Each level is cut into square tiles and stored in a directory as
+
+``pyramid.json``
+    Grid origin, cell size, tile size and level shapes.
+``index_<level>.npy``
+    (tile rows, tile columns) array giving the slot of each tile in the
+    data files, or -1 for tiles without postcodes.
+``band_<level>.npy``, ``risk_<level>.npy``
+    (slots, tile size, tile size) arrays of the stored tiles.
+
+so any tile is read with one lookup from memory mapped files. Rows run
+northwards from the origin and columns eastwards.
+"""
+import json
+import os
+
+import numpy as np
+
+__all__ = ['GRID_BOUNDS', 'build_pyramid', 'TilePyramid']
+
+# (west, south, east, north) extent of the OS national grid, in metres
+
+GRID_BOUNDS = (0.0, 0.0, 700000.0, 1300000.0)
+
+PYRAMID_VERSION = 1
+
+def _reduce(band, risk):
+    """Halve the resolution of a level, padding odd dimensions."""
+    rows, columns = -(-band.shape[0]//2)*2, -(-band.shape[1]//2)*2
+    band = np.pad(band, ((0, rows-band.shape[0]), (0, columns-band.shape[1])),
+                  constant_values=-1)
+    risk = np.pad(risk, ((0, rows-risk.shape[0]), (0, columns-risk.shape[1])))
+    return (band.reshape(rows//2, 2, columns//2, 2).max(axis=(1, 3)),
+            risk.reshape(rows//2, 2, columns//2, 2).sum(axis=(1, 3)))
+
+def _write_level(path, level, band, risk, tile_size):
+    """Cut a level into tiles and write the non-empty ones."""
+    rows, columns = -(-band.shape[0]//tile_size), -(-band.shape[1]//tile_size)
+    pad = ((0, rows*tile_size-band.shape[0]), (0, columns*tile_size-band.shape[1]))
+
+    def tiles(array, fill):
+        array = np.pad(array, pad, constant_values=fill)
+        return array.reshape(rows, tile_size, columns, tile_size).swapaxes(1, 2)
+
+    band, risk = tiles(band, -1), tiles(risk, 0)
+    occupied = (band >= 0).any(axis=(2, 3))
+    index = np.full((rows, columns), -1, dtype=np.int32)
+    index[occupied] = np.arange(occupied.sum())
+
+    np.save(os.path.join(path, 'index_%d.npy'%level), index)
+    np.save(os.path.join(path, 'band_%d.npy'%level), band[occupied])
+    np.save(os.path.join(path, 'risk_%d.npy'%level), risk[occupied])
+
+def build_pyramid(path, easting, northing, codes, risk, cell=1000.0, levels=6,
+                  tile_size=256, bounds=GRID_BOUNDS):
+    """Build a tile pyramid from scored locations.
+
+    Parameters
+    ----------
+
+    path: str
+        Directory to write.
+    easting: numpy.ndarray of floats
+        OS Eastings of the locations.
+    northing: numpy.ndarray of floats
+        OS Northings of the locations.
+    codes: numpy.ndarray of ints
+        Numerical risk code of each location.
+    risk: numpy.ndarray of floats
+        Annual flood risk of each location.
+    cell: float, optional
+        Cell size of the finest level, in metres.
+    levels: int, optional
+        Number of levels.
+    tile_size: int, optional
+        Number of cells along each side of a tile.
+    bounds: tuple of floats, optional
+        (west, south, east, north) extent of the pyramid. Locations
+        outside it are left out.
+
+    Returns
+    -------
+
+    TilePyramid
+        The pyramid written.
+    """
+    west, south, east, north = bounds
+    shape = (int(np.ceil((north-south)/cell)), int(np.ceil((east-west)/cell)))
+    row = np.floor((np.asarray(northing)-south)/cell).astype(np.int64)
+    column = np.floor((np.asarray(easting)-west)/cell).astype(np.int64)
+    inside = (row >= 0) & (row < shape[0]) & (column >= 0) & (column < shape[1])
+    cells = row[inside]*shape[1] + column[inside]
+
+    band = np.full(shape[0]*shape[1], -1, dtype=np.int8)
+    np.maximum.at(band, cells, np.asarray(codes, dtype=np.int8)[inside])
+    band = band.reshape(shape)
+    risk = np.bincount(cells, np.nan_to_num(np.asarray(risk, dtype=np.float64)[inside]),
+                       minlength=shape[0]*shape[1]).reshape(shape)
+
+    os.makedirs(path, exist_ok=True)
+    shapes = []
+    for level in range(levels):
+        if level:
+            band, risk = _reduce(band, risk)
+        _write_level(path, level, band, risk, tile_size)
+        shapes.append(band.shape)
+
+    with open(os.path.join(path, 'pyramid.json'), 'w') as meta:
+        json.dump({'version': PYRAMID_VERSION, 'origin': [west, south], 'cell': cell,
+                   'tile_size': tile_size, 'shapes': shapes}, meta)
+
+    return TilePyramid(path)
+
+class TilePyramid(object):
+    """Read access to a tile pyramid written by `build_pyramid`."""
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+
+        path: str
+            Directory of the pyramid.
+        """
+        with open(os.path.join(path, 'pyramid.json')) as meta:
+            meta = json.load(meta)
+        if meta['version'] != PYRAMID_VERSION:
+            raise ValueError('%s: not a version %d tile pyramid'%(path, PYRAMID_VERSION))
+        self.origin = tuple(meta['origin'])
+        self.cell = meta['cell']
+        self.tile_size = meta['tile_size']
+        self.shapes = [tuple(shape) for shape in meta['shapes']]
+        self._index = []
+        self._band = []
+        self._risk = []
+        for level in range(len(self.shapes)):
+            self._index.append(np.load(os.path.join(path, 'index_%d.npy'%level)))
+            self._band.append(np.load(os.path.join(path, 'band_%d.npy'%level), mmap_mode='r'))
+            self._risk.append(np.load(os.path.join(path, 'risk_%d.npy'%level), mmap_mode='r'))
+
+    @property
+    def levels(self):
+        """Number of levels."""
+        return len(self.shapes)
+
+    def cell_size(self, level):
+        """Cell size of a level, in metres."""
+        return self.cell*2**level
+
+    def tiles(self, level):
+        """Number of (rows, columns) of tiles of a level."""
+        return self._index[level].shape
+
+    def tile(self, level, row, column):
+        """Get one tile of a level.
+
+        Parameters
+        ----------
+
+        level: int
+            Level, 0 being the finest.
+        row: int
+            Tile row, counting northwards.
+        column: int
+            Tile column, counting eastwards.
+
+        Returns
+        -------
+
+        band: numpy.ndarray of ints
+            (tile size, tile size) highest band codes, -1 for empty cells.
+        risk: numpy.ndarray of floats
+            (tile size, tile size) summed annual flood risks.
+        """
+        slot = self._index[level][row, column]
+        if slot < 0:
+            return (np.full((self.tile_size,)*2, -1, dtype=np.int8),
+                    np.zeros((self.tile_size,)*2))
+        return self._band[level][slot], self._risk[level][slot]
+
+    def tile_at(self, level, easting, northing):
+        """Get the (row, column) of the tile of a level holding a location."""
+        size = self.cell_size(level)*self.tile_size
+        return (int((northing-self.origin[1])//size), int((easting-self.origin[0])//size))
+
+    def level(self, level):
+        """Assemble the full (band, risk) arrays of a level from its tiles."""
+        rows, columns = self.tiles(level)
+        band = np.full((rows*self.tile_size, columns*self.tile_size), -1, dtype=np.int8)
+        risk = np.zeros(band.shape)
+        occupied = self._index[level] >= 0
+        # write tiles through views of the full arrays, in tile order
+        band.reshape(rows, self.tile_size, columns,
+                     self.tile_size).swapaxes(1, 2)[occupied] = self._band[level]
+        risk.reshape(rows, self.tile_size, columns,
+                     self.tile_size).swapaxes(1, 2)[occupied] = self._risk[level]
+        shape = self.shapes[level]
+        return band[:shape[0], :shape[1]], risk[:shape[0], :shape[1]]
@@ -1,15 +1,438 @@
 """Locator functions to interact with geographic data"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter as timer
+
 import numpy as np
 import pandas as pd
-from scipy.spatial import distance
 from flood_tool import geo
 
 __all__ = ['Tool']
 
+# Postcode levels for risk rollups, from coarsest to finest
+
+POSTCODE_LEVELS = ('area', 'district', 'sector')
+
+# Flood probability bands, indexed by their numerical risk code
+
+BANDS = np.array(['Zero', 'Very Low', 'Low', 'Medium', 'High'])
+
+# Annual probability of a flood in each band, indexed by numerical risk code
+
+BAND_PROBABILITIES = np.array([0, 1/1000, 1/100, 1/50, 1/10])
+
+# Fraction of property value lost in a flood
+
+IMPACT_FACTOR = 0.05
+
+_BAND_ORDER = np.argsort(BANDS)
+_SORTED_BANDS = BANDS[_BAND_ORDER]
+
+def band_codes(bands):
+    """Convert flood probability band names to numerical risk codes.
+
+    Parameters
+    ----------
+
+    bands: sequence of strs
+        Flood probability band names, e.g. `'High'`.
+
+    Returns
+    -------
+
+    numpy.ndarray of ints
+        Codes from 0 (`Zero`) to 4 (`High`). Unknown names return -1.
+    """
+    bands = np.asarray(bands, dtype=str)
+    idx = np.searchsorted(_SORTED_BANDS, bands).clip(0, len(BANDS)-1)
+    return np.where(_SORTED_BANDS[idx] == bands, _BAND_ORDER[idx], -1)
+
+# Columns read from each input file, with their types
+
+SCHEMAS = {'postcode_file': {'Postcode': str,
+                             'Latitude': np.float64,
+                             'Longitude': np.float64},
+           'risk_file': {'X': np.float64,
+                         'Y': np.float64,
+                         'radius': np.float64,
+                         'prob_4band': str},
+           'values_file': {'Postcode': str,
+                           'Total Value': np.float64}}
+
+def _read_typed(filename, schema):
+    """Read the declared columns of a .csv file, returning the frame and the
+    seconds taken."""
+    t0 = timer()
+    try:
+        frame = pd.read_csv(filename, usecols=list(schema), dtype=schema)
+    except ValueError as err:
+        raise ValueError('%s: %s'%(filename, err)) from err
+    return frame, timer()-t0
+
+def read_inputs(postcode_file, risk_file, values_file):
+    """Read and validate the three `Tool` input files concurrently.
+
+    Only the columns declared in `SCHEMAS` are parsed, with their declared
+    types rather than inferred ones.
+
+    Parameters
+    ----------
+
+    postcode_file : str
+        Filename of a .csv file containing geographic location data for postcodes.
+    risk_file : str
+        Filename of a .csv file containing flood risk data.
+    values_file : str
+        Filename of a .csv file containing property value data for postcodes.
+
+    Returns
+    -------
+
+    frames: dict
+        `pandas.DataFrame` of each file, keyed as in `SCHEMAS`.
+    times: dict
+        Seconds taken to parse each file, keyed as in `SCHEMAS`.
+    """
+    files = {'postcode_file': postcode_file,
+             'risk_file': risk_file,
+             'values_file': values_file}
+
+    with ThreadPoolExecutor(len(files)) as pool:
+        futures = {key: pool.submit(_read_typed, filename, SCHEMAS[key])
+                   for key, filename in files.items()}
+        results = {key: future.result() for key, future in futures.items()}
+
+    frames = {key: frame for key, (frame, _) in results.items()}
+    times = {key: time for key, (_, time) in results.items()}
+
+    labels = frames['risk_file']['prob_4band']
+    unknown = sorted(set(labels.dropna().unique()) - set(BANDS[1:]))
+    if unknown or labels.isna().any():
+        raise ValueError('%s: unknown prob_4band labels %s'%(risk_file, unknown or ['(missing)']))
+    for key in ('postcode_file', 'values_file'):
+        if frames[key]['Postcode'].isna().any():
+            raise ValueError('%s: missing postcodes'%files[key])
+
+    return frames, times
+
+def _frozen(array):
+    """Make an array read-only, so it can be shared safely between threads."""
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+def normalize_postcodes(postcodes):
+    """Convert postcodes to the seven character form used by `Tool`.
+
+    Spaces are removed, letters upper cased and the outward code padded
+    with spaces to four characters, so that `'me16 0fn'` becomes
+    `'ME160FN'` and `'da99fd'` becomes `'DA9 9FD'`.
+
+    Parameters
+    ----------
+
+    postcodes: sequence of strs
+        Postcodes in any common format.
+
+    Returns
+    -------
+
+    numpy.ndarray of strs
+        Normalized postcodes.
+    """
+    codes = pd.Series(np.asarray(postcodes, dtype=str)).str.replace(" ", "").str.upper()
+    return (codes.str[:-3].str.ljust(4) + codes.str[-3:]).to_numpy(dtype=str)
+
+def normalize_prefixes(prefixes):
+    """Convert partial postcodes to prefixes of the normalized form used by
+    `Tool`.
+
+    Letters are upper cased. A space separates the outward code, which is
+    padded to four characters, from the start of the inward code, so that
+    `'ct14 7'` becomes `'CT147'` and `'me1 '` becomes `'ME1 '`. Without a
+    space, up to four characters are taken as the start of an outward code,
+    so that `'ME1'` matches `'ME1 '` and `'ME16'` alike, and longer ones are
+    split before the last digit.
+
+    Parameters
+    ----------
+
+    prefixes: sequence of strs
+        Partial postcodes.
+
+    Returns
+    -------
+
+    numpy.ndarray of strs
+        Normalized prefixes.
+    """
+    codes = pd.Series(np.asarray(prefixes, dtype=str)).str.upper().str.lstrip()
+    spaced = codes.str.contains(' ')
+    parts = codes.str.split(' ', n=1, expand=True).reindex(columns=[0, 1]).fillna('')
+    split = codes.str.replace(' ', '').str.extract(r'^(.*?)(\d[A-Z]*)$').fillna('')
+    short = (codes.str.len() <= 4) | (split[1] == '')
+    out = np.where(spaced, parts[0].str.ljust(4) + parts[1].str.replace(' ', ''),
+                   np.where(short, codes, split[0].str.ljust(4) + split[1]))
+    return out.astype(str)
+
+def _prefix_end(prefixes, dtype='U7'):
+    """Get the least strings of type `dtype` greater than every string
+    starting with each prefix, by incrementing their last characters."""
+    prefixes = np.asarray(prefixes, dtype=dtype)
+    chars = prefixes.view(np.uint32).reshape(len(prefixes), -1).copy()
+    length = np.char.str_len(prefixes)
+    chars[length > 0, (length-1).clip(0)[length > 0]] += 1
+    # an empty prefix matches everything
+    chars[length == 0, 0] = 0x10ffff
+    return chars.view(prefixes.dtype).ravel()
+
+# Version of the data written by `Tool.save`, to be increased whenever the
+# prepared attributes of a `Tool` change
+
+TOOL_CACHE_VERSION = 1
+
+# Identifier and version of the zone file format written by `save_zones`
+
+ZONE_FILE_MAGIC = b'FTZONES\0'
+ZONE_FILE_VERSION = 1
+
+# Alignment in bytes of arrays in zone files
+
+_ZONE_FILE_ALIGN = 64
+
+def _aligned(size):
+    """Round a number of bytes up to the zone file alignment."""
+    return -(-size//_ZONE_FILE_ALIGN)*_ZONE_FILE_ALIGN
+
+def file_digest(filename):
+    """Get the SHA-256 hex digest of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as infile:
+        for block in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_zones(filename, arrays, digest):
+    """Write prepared zone arrays to a binary zone file.
+
+    The file holds a short header of `ZONE_FILE_MAGIC`, `ZONE_FILE_VERSION`
+    and a JSON description of the arrays, followed by the raw array data,
+    aligned so that each array can be memory mapped. The file is written
+    under a temporary name and then renamed, so readers never see a
+    partial file.
+
+    Parameters
+    ----------
+
+    filename: str
+        Name of the file to write.
+    arrays: dict
+        Arrays to save, keyed by name.
+    digest: str
+        Digest of the flood probability file the arrays were built from,
+        see `file_digest`.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    described, offset = {}, 0
+    for name, array in arrays.items():
+        described[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset += _aligned(array.nbytes)
+    header = json.dumps({'digest': digest, 'arrays': described}).encode()
+    start = _aligned(len(ZONE_FILE_MAGIC)+8+len(header))
+
+    tmp = '%s.%d.tmp'%(filename, os.getpid())
+    with open(tmp, 'wb') as outfile:
+        outfile.write(ZONE_FILE_MAGIC)
+        outfile.write(np.array([ZONE_FILE_VERSION, len(header)], dtype='<u4').tobytes())
+        outfile.write(header)
+        for name, array in arrays.items():
+            outfile.seek(start + described[name]['offset'])
+            outfile.write(array.tobytes())
+        outfile.truncate(start + offset)
+    os.replace(tmp, filename)
+
+def load_zones(filename, digest=None):
+    """Read zone arrays from a file written by `save_zones`.
+
+    Parameters
+    ----------
+
+    filename: str
+        Name of the file to read.
+    digest: str, optional
+        Expected digest of the flood probability file.
+
+    Returns
+    -------
+
+    dict
+        Read-only memory maps of the arrays, keyed by name.
+
+    Raises
+    ------
+
+    ValueError
+        If the file is not a zone file of the current version, or was built
+        from a different flood probability file.
+    """
+    with open(filename, 'rb') as infile:
+        magic = infile.read(len(ZONE_FILE_MAGIC))
+        version, length = np.frombuffer(infile.read(8), dtype='<u4').tolist()
+        header = infile.read(length)
+    if magic != ZONE_FILE_MAGIC or version != ZONE_FILE_VERSION:
+        raise ValueError('%s: not a version %d zone file'%(filename, ZONE_FILE_VERSION))
+    header = json.loads(header)
+    if digest is not None and header['digest'] != digest:
+        raise ValueError('%s: built from a different flood probability file'%filename)
+    start = _aligned(len(ZONE_FILE_MAGIC)+8+length)
+
+    # map the file once, and view each array in the mapping
+    data = np.memmap(filename, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, info in header['arrays'].items():
+        dtype = np.dtype(info['dtype'])
+        size = int(np.prod(info['shape']))*dtype.itemsize
+        offset = start + info['offset']
+        arrays[name] = data[offset:offset+size].view(dtype).reshape(info['shape'])
+    return arrays
+
+class ZoneIndex(object):
+    """Spatial index over the flood zone circles of a single band."""
+
+    def __init__(self, x, y, radius, ids=None):
+        """
+        Parameters
+        ----------
+
+        x: numpy.ndarray of floats
+            OS Eastings of zone centres.
+        y: numpy.ndarray of floats
+            OS Northings of zone centres.
+        radius: numpy.ndarray of floats
+            Zone radii.
+        ids: numpy.ndarray of ints, optional
+            Identifiers reported for the zones by `locate`. Defaults to
+            their positions.
+        """
+        self._build(np.column_stack((x, y)), radius, ids)
+
+    @classmethod
+    def from_points(cls, points, radius, ids=None):
+        """Create an index over an (N, 2) array of zone centres, which is
+        used without copying, so may be a memory map."""
+        index = cls.__new__(cls)
+        index._build(points, radius, ids)
+        return index
+
+    def _build(self, points, radius, ids):
+        from scipy.spatial import cKDTree
+
+        self.radius = _frozen(np.asarray(radius, dtype=np.float64))
+        self.ids = _frozen(np.arange(len(self.radius)) if ids is None
+                           else np.asarray(ids))
+        self.max_radius = self.radius.max() if len(self.radius) else 0.0
+        self.tree = (cKDTree(_frozen(np.asarray(points, dtype=np.float64)), copy_data=False)
+                     if len(self.radius) else None)
+
+    def __len__(self):
+        return len(self.radius)
+
+    def locate(self, easting, northing, k=8):
+        """Find a zone of the index containing each location.
+
+        The `k` nearest zone centres within the largest zone radius are
+        tested first, doubling `k` only for locations where all `k`
+        candidates miss but further candidates remain.
+
+        Parameters
+        ----------
+
+        easting: numpy.ndarray of floats
+            OS Eastings of locations of interest
+        northing: numpy.ndarray of floats
+            OS Northings of locations of interest
+        k: int, optional
+            Number of candidate zones tested in the first pass.
+
+        Returns
+        -------
+
+        numpy.ndarray of ints
+            Id of the zone with the nearest centre among those containing
+            each location, or -1 for locations outside every zone.
+        """
+        points = np.column_stack((easting, northing))
+        found = np.full(len(points), -1, dtype=self.ids.dtype)
+        todo = np.arange(len(points))
+        k = min(k, len(self))
+
+        while len(todo) and k:
+            # scipy leaves out neighbours at exactly the bound, so widen it
+            dist, idx = self.tree.query(points[todo], k=k,
+                                        distance_upper_bound=np.nextafter(self.max_radius,
+                                                                          np.inf))
+            dist = dist.reshape(len(todo), k)
+            idx = idx.reshape(len(todo), k).clip(0, len(self)-1)
+            # test squared offsets as the brute force zone test does, so
+            # locations on zone edges are classified the same way
+            centres = self.tree.data[idx]
+            dx = points[todo, 0, None] - centres[..., 0]
+            dy = points[todo, 1, None] - centres[..., 1]
+            hits = np.isfinite(dist) & (dx*dx + dy*dy <= self.radius[idx]**2)
+            hit = hits.any(axis=1)
+            first = hits.argmax(axis=1)
+            found[todo[hit]] = self.ids[idx[hit, first[hit]]]
+            if k == len(self):
+                break
+            todo = todo[~hit & np.isfinite(dist[:, -1])]
+            k = min(2*k, len(self))
+
+        return found
+
+    def contains(self, easting, northing, k=8):
+        """Test whether locations lie in any zone of the index.
+
+        Parameters are as for `locate`.
+
+        Returns
+        -------
+
+        numpy.ndarray of bools
+            True for locations inside at least one zone.
+        """
+        return self.locate(easting, northing, k) >= 0
+
 class Tool(object):
-    """Class to interact with a postcode database file."""
+    """Class to interact with a postcode database file.
+
+    The query methods only read the arrays prepared when the `Tool` is
+    built, which are made read-only, and keep any intermediate data local to
+    the call. The only shared state they write is the cache of results
+    computed once for all postcodes (scores, ranks and rollups), which is
+    filled under a lock. A single `Tool` can therefore answer queries from
+    many threads at once, and the NumPy kernels doing the work release the
+    GIL.
+    """
+
+    # Classify locations band by band through `ZoneIndex`es, rather than
+    # testing every zone at once
+    cascade = True
 
-    def __init__(self, postcode_file=None, risk_file=None, values_file=None):
+    # Largest number of (point, zone) pairs tested at once without cascade
+    chunk_elements = 2**22
+
+    # Floating point type of (point, zone) tests without cascade. Tests in
+    # float32 are made on offsets from the OS false origin, and locations
+    # within `edge_margin` metres of a zone edge are retested in float64
+    dtype = np.float64
+    edge_margin = 1.0
+
+    def __init__(self, postcode_file=None, risk_file=None, values_file=None,
+                 zone_file=None):
         """
 
         Reads postcode and flood risk files and provides a postcode locator service.
@@ -21,12 +444,19 @@ class Tool(object):
             Filename of a .csv file containing geographic location data for postcodes.
         risk_file : str, optional
             Filename of a .csv file containing flood risk data.
-        postcode_file : str, optional
+        values_file : str, optional
             Filename of a .csv file containing property value data for postcodes.
+        zone_file : str, optional
+            Filename of a binary zone file (see `save_zones`). If it was
+            built from the same `risk_file`, the zone arrays and indexes are
+            mapped from it, otherwise it is (re)written.
+
+        The time taken to parse each file is kept in the `parse_times` dict.
         """
-        self.dfp = pd.read_csv(postcode_file)
-        self.dff = pd.read_csv(risk_file)
-        self.dfc = pd.read_csv(values_file)
+        frames, self.parse_times = read_inputs(postcode_file, risk_file, values_file)
+        self.dfp = frames['postcode_file']
+        self.dff = frames['risk_file']
+        self.dfc = frames['values_file']
         self.dfc['Postcode'] = self.dfc['Postcode'].str.replace(" ", "")
         self.dfp['Postcode'] = self.dfp['Postcode'].str.replace(" ", "")
 
@@ -37,8 +467,553 @@ class Tool(object):
         self.dfp['Northing'] = northing
         self.dfp = self.dfp.merge(self.dfc[['Postcode', 'Total Value']], how='left', left_on='Postcode', right_on='Postcode').fillna(0)
         self.dff['Numerical Risk'] = self.dff['prob_4band'].replace(['High', 'Medium', 'Low', 'Very Low'], [4, 3, 2, 1])
-        self.dfp['Postcode'] = self.dfp['Postcode'].apply(lambda x: x[0:3] + " " + x[3:6] if len(x) == 6 else x)
-        self.dfp['Postcode'] = self.dfp['Postcode'].apply(lambda x: x[0:2] + "  " + x[4:6] if len(x) == 5 else x)
+        self.dfp['Postcode'] = normalize_postcodes(self.dfp['Postcode'])
+
+        zones = None
+        if zone_file:
+            digest = file_digest(risk_file)
+            try:
+                zones = load_zones(zone_file, digest)
+            except (OSError, ValueError):
+                save_zones(zone_file, self._zone_arrays(), digest)
+                zones = load_zones(zone_file, digest)
+        self._prepare(zones)
+
+    def _zone_arrays(self):
+        """Get the zone arrays stored in zone files, built from `dff`.
+
+        These are the centres, squared radii and band codes of the zones in
+        `dff` order, and their centres, radii and `dff` rows sorted by
+        band, with `band_start` giving the first sorted zone of each band.
+        """
+        x = self.dff['X'].to_numpy(np.float64)
+        y = self.dff['Y'].to_numpy(np.float64)
+        radius = self.dff['radius'].to_numpy(np.float64)
+        code = band_codes(self.dff['prob_4band']).clip(0).astype(np.int8)
+        rows = np.argsort(code, kind='stable')
+
+        return {'x': x, 'y': y, 'r2': radius**2, 'code': code,
+                'band_xy': np.column_stack((x[rows], y[rows])),
+                'band_radius': radius[rows],
+                'band_row': rows,
+                'band_start': np.searchsorted(code[rows], np.arange(len(BANDS)+1))}
+
+    def _prepare(self, zones=None):
+        """Build the read-only arrays used by the query methods, taking the
+        zone arrays from `zones` if given, or building them from `dff`."""
+        from scipy.spatial import cKDTree
+
+        postcodes = self.dfp['Postcode'].to_numpy(dtype=str)
+        order = np.argsort(postcodes, kind='stable')
+        self._postcodes = _frozen(postcodes[order])
+        self._postcode_rows = _frozen(order)
+        self._row_postcodes = _frozen(postcodes)
+        self._latitude = _frozen(self.dfp['Latitude'].to_numpy(np.float64))
+        self._longitude = _frozen(self.dfp['Longitude'].to_numpy(np.float64))
+        self._easting = _frozen(self.dfp['Easting'].to_numpy(np.float64))
+        self._northing = _frozen(self.dfp['Northing'].to_numpy(np.float64))
+        self._value = _frozen(self.dfp['Total Value'].to_numpy(np.float64))
+        self._postcode_tree = cKDTree(np.column_stack((self._easting, self._northing)))
+
+        # integer group codes of each postcode at each level, for rollups
+        codes = pd.Series(postcodes)
+        outward = codes.str[:4].str.rstrip()
+        groups = {'area': outward.str.extract('^([A-Z]+)', expand=False).fillna(''),
+                  'district': outward,
+                  'sector': outward + ' ' + codes.str[4:5]}
+        self._group_names = {}
+        self._group_codes = {}
+        for level in POSTCODE_LEVELS:
+            names, group = np.unique(groups[level].to_numpy(dtype=str), return_inverse=True)
+            self._group_names[level] = _frozen(names)
+            self._group_codes[level] = _frozen(group)
+        self._rollups = {}
+        self._cache_lock = threading.RLock()
+
+        zones = zones or self._zone_arrays()
+        self._zone_x = _frozen(zones['x'])
+        self._zone_y = _frozen(zones['y'])
+        self._zone_r2 = _frozen(zones['r2'])
+        self._zone_code = _frozen(zones['code'])
+        start = zones['band_start']
+        self._zone_index = {code: ZoneIndex.from_points(zones['band_xy'][start[code]:start[code+1]],
+                                                        zones['band_radius'][start[code]:start[code+1]],
+                                                        zones['band_row'][start[code]:start[code+1]])
+                            for code in range(len(BANDS)-1, 0, -1)}
+
+    def _rows(self, postcodes):
+        """Get the `dfp` rows of postcodes, with -1 for invalid postcodes."""
+        postcodes = np.asarray(postcodes, dtype=str)
+        if not len(self._postcodes):
+            return np.full(postcodes.shape, -1)
+        idx = np.searchsorted(self._postcodes, postcodes).clip(0, len(self._postcodes)-1)
+        return np.where(self._postcodes[idx] == postcodes, self._postcode_rows[idx], -1)
+
+    @staticmethod
+    def _take(array, rows):
+        """Get array values for `dfp` rows, with `numpy.nan` for invalid rows."""
+        return np.where(rows >= 0, array[rows], np.nan)
+
+    def _flood_codes(self, easting, northing):
+        """Get the numerical risk code of the highest band zone containing
+        each location, or 0 outside every zone."""
+        if self.cascade:
+            return self.classify_cascade(easting, northing)[0]
+
+        easting = np.asarray(easting, dtype=np.float64)
+        northing = np.asarray(northing, dtype=np.float64)
+        codes = np.zeros(len(easting), dtype=np.int8)
+        if not len(self._zone_code):
+            return codes
+
+        dtype = np.dtype(self.dtype)
+        if dtype == np.float64:
+            return self._broadcast_codes(easting, northing, self._zone_x, self._zone_y,
+                                         self._zone_r2)
+
+        origin = geo.osgb36.E_0, geo.osgb36.N_0
+        zone_x = (self._zone_x - origin[0]).astype(dtype)
+        zone_y = (self._zone_y - origin[1]).astype(dtype)
+        radius = np.sqrt(self._zone_r2)
+        inner = ((radius - self.edge_margin).clip(0)**2).astype(dtype)
+        outer = ((radius + self.edge_margin)**2).astype(dtype)
+        x = (easting - origin[0]).astype(dtype)
+        y = (northing - origin[1]).astype(dtype)
+
+        step = max(1, self.chunk_elements//len(self._zone_code))
+        for start in range(0, len(easting), step):
+            chunk = slice(start, start+step)
+            sure = self._broadcast_codes(x[chunk], y[chunk], zone_x, zone_y, inner)
+            maybe = self._broadcast_codes(x[chunk], y[chunk], zone_x, zone_y, outer)
+            near = np.flatnonzero(maybe > sure)
+            if len(near):
+                sure[near] = self._broadcast_codes(easting[chunk][near], northing[chunk][near],
+                                                   self._zone_x, self._zone_y, self._zone_r2)
+            codes[chunk] = sure
+
+        return codes
+
+    def _broadcast_codes(self, easting, northing, zone_x, zone_y, zone_r2):
+        """Get the highest numerical risk code of the zones containing each
+        location, testing chunks of locations against every zone at once."""
+        codes = np.zeros(len(easting), dtype=np.int8)
+        step = max(1, self.chunk_elements//len(self._zone_code))
+        for start in range(0, len(easting), step):
+            dx = easting[start:start+step, None] - zone_x
+            dy = northing[start:start+step, None] - zone_y
+            inside = dx*dx + dy*dy <= zone_r2
+            codes[start:start+step] = np.where(inside, self._zone_code, 0).max(axis=1)
+
+        return codes
+
+    def refresh(self):
+        """Rebuild the prepared arrays and rollups after `dfp` or `dff` change."""
+        self._prepare()
+
+    def get_risk_rollup(self, level='district'):
+        """Get total flood cost, annual flood risk and band counts by postcode group.
+
+        Totals are computed once per level with `numpy.bincount` over
+        precomputed integer group codes, and kept until the data is
+        reloaded or `refresh` is called.
+
+        Parameters
+        ----------
+
+        level: str, optional
+            Postcode level to group by, one of `area` (e.g. `ME`),
+            `district` (e.g. `ME16`) or `sector` (e.g. `ME16 0`).
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe indexed by group name (index named by `level`), with
+            columns `Postcodes`, `Flood Cost`, `Flood Risk` and a count for
+            each probability band.
+        """
+        if level not in POSTCODE_LEVELS:
+            raise ValueError('level must be one of %s'%(POSTCODE_LEVELS,))
+
+        return self._cached(level, lambda: self._rollup_table(level)).copy()
+
+    def _rollup_table(self, level):
+        """Compute the rollup table of a postcode level."""
+        codes, cost, risk = self._all_scores()
+        group = self._group_codes[level]
+        size = len(self._group_names[level])
+
+        table = {'Postcodes': np.bincount(group, minlength=size),
+                 'Flood Cost': np.bincount(group, cost, minlength=size),
+                 'Flood Risk': np.bincount(group, risk, minlength=size)}
+        counts = np.bincount(group*len(BANDS) + codes,
+                             minlength=size*len(BANDS)).reshape(size, len(BANDS))
+        for code in range(len(BANDS)-1, -1, -1):
+            table[str(BANDS[code])] = counts[:, code]
+
+        return pd.DataFrame(table, index=pd.Index(self._group_names[level], name=level))
+
+    def _cached(self, key, compute):
+        """Get a result cached until the data is rebuilt, computing it with
+        `compute` under the cache lock, so that it is computed only once
+        however many threads ask for it."""
+        with self._cache_lock:
+            if key not in self._rollups:
+                self._rollups[key] = compute()
+            return self._rollups[key]
+
+    def _all_scores(self):
+        """Get band codes, flood costs and annual flood risks of every `dfp`
+        row, classifying them once until the data is rebuilt."""
+        return self._cached('scores',
+                            lambda: tuple(_frozen(array) for array in
+                                          self._row_scores(np.arange(len(self._row_postcodes)))))
+
+    def get_scenario_risk(self, impact=IMPACT_FACTOR, probabilities=BAND_PROBABILITIES,
+                          value_multiplier=1.0, chunksize=65536, dtype=np.float64):
+        """Get the annual flood risk of every postcode under many scenarios.
+
+        Parameters may be given per scenario, and are broadcast against each
+        other. Every postcode is classified into its band once, then risks
+        for all scenarios are computed as one matrix operation per chunk of
+        `chunksize` postcodes, which bounds the temporary memory used.
+
+        Parameters
+        ----------
+
+        impact: float or numpy.ndarray of floats, optional
+            Fraction of property value lost in a flood, per scenario.
+        probabilities: numpy.ndarray of floats, optional
+            Annual flood probability of each band, indexed by numerical risk
+            code, as a (5,) array or an (S, 5) array for S scenarios.
+        value_multiplier: float or numpy.ndarray of floats, optional
+            Factor applied to all property values, per scenario.
+        chunksize: int, optional
+            Number of postcodes computed at once.
+        dtype: numpy.dtype, optional
+            Type of the returned risks.
+
+        Returns
+        -------
+
+        numpy.ndarray
+            Array of (S, N) annual flood risks in pounds sterling, for the N
+            postcodes in `dfp` order.
+        """
+        probabilities = np.atleast_2d(np.asarray(probabilities, dtype=np.float64))
+        scale = (np.asarray(impact, dtype=np.float64)
+                 *np.asarray(value_multiplier, dtype=np.float64))
+        scale, _ = np.broadcast_arrays(np.atleast_1d(scale), probabilities[:, 0])
+        probabilities = np.broadcast_to(probabilities, (len(scale), len(BANDS)))
+        # per scenario probability times impact and value multiplier
+        weights = probabilities*scale[:, None]
+
+        codes, _, _ = self._all_scores()
+        codes = codes.clip(0)
+        risk = np.empty((len(weights), len(codes)), dtype=dtype)
+        for start in range(0, len(codes), chunksize):
+            chunk = slice(start, start+chunksize)
+            np.multiply(weights[:, codes[chunk]], self._value[chunk], out=risk[:, chunk],
+                        casting='same_kind')
+
+        return risk
+
+    def get_scenario_ranking_deltas(self, risk, baseline=0):
+        """Compare postcode risk rankings between scenarios.
+
+        Parameters
+        ----------
+
+        risk: numpy.ndarray
+            Array of (S, N) risks, as from `get_scenario_risk`.
+        baseline: int, optional
+            Scenario the others are compared with.
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe indexed by `Postcode` with the `Baseline Rank` of each
+            postcode (0 being the highest risk, ties ordered by postcode)
+            and a `Scenario i` column for each scenario giving its change in
+            rank from the baseline, so positive values fall down the ranking.
+        """
+        ranks = np.empty(risk.shape, dtype=np.intp)
+        positions = np.arange(risk.shape[1])
+        for scenario in range(len(risk)):
+            # stable sort of postcode ordered rows breaks ties by postcode
+            order = self._postcode_rows[np.argsort(-risk[scenario, self._postcode_rows],
+                                                   kind='stable')]
+            ranks[scenario, order] = positions
+
+        table = {'Baseline Rank': ranks[baseline]}
+        for scenario in range(len(risk)):
+            table['Scenario %d'%scenario] = ranks[scenario] - ranks[baseline]
+        return pd.DataFrame(table, index=pd.Index(self._row_postcodes, name='Postcode'))
+
+    def get_loss_groups(self):
+        """Group postcodes which flood together for loss simulations.
+
+        Each postcode is grouped with the others in a zone of its flood
+        probability band containing it, so that a zone floods as a whole.
+
+        Returns
+        -------
+
+        group: numpy.ndarray of ints
+            Correlation group of each postcode in `dfp` order, or -1 for
+            postcodes in the Zero band.
+        probabilities: numpy.ndarray of floats
+            Annual flood probability of each group.
+        losses: numpy.ndarray of floats
+            Loss in pounds sterling of each group when it floods.
+        """
+        codes, _, _ = self._all_scores()
+        zone = np.full(len(codes), -1, dtype=np.intp)
+        for code, index in self._zone_index.items():
+            rows = np.flatnonzero(codes == code)
+            zone[rows] = index.locate(self._easting[rows], self._northing[rows])
+
+        zones, group = np.unique(zone[zone >= 0], return_inverse=True)
+        groups = np.full(len(codes), -1, dtype=np.intp)
+        groups[zone >= 0] = group
+        probabilities = BAND_PROBABILITIES[self._zone_code[zones]]
+        losses = IMPACT_FACTOR*np.bincount(group, np.nan_to_num(self._value[zone >= 0]),
+                                           minlength=len(zones))
+
+        return groups, probabilities, losses
+
+    def simulate_annual_losses(self, years=10000, seed=None, workers=1):
+        """Simulate the distribution of annual flood losses of all postcodes.
+
+        Parameters
+        ----------
+
+        years: int, optional
+            Number of years simulated.
+        seed: int, optional
+            Seed of the simulation, results being independent of `workers`.
+        workers: int, optional
+            Number of worker processes.
+
+        Returns
+        -------
+
+        flood_tool.montecarlo.LossStatistics
+            Streaming statistics of the simulated annual losses, in pounds
+            sterling, with a `summary` of the mean, spread and quantiles.
+        """
+        from .montecarlo import simulate_losses
+
+        _, probabilities, losses = self.get_loss_groups()
+        return simulate_losses(probabilities, losses, years, seed, workers)
+
+    def get_sorted_risk_rollup(self, level='district'):
+        """Get postcode groups ordered by annual flood risk.
+
+        Parameters
+        ----------
+
+        level: str, optional
+            Postcode level to group by, see `get_risk_rollup`.
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe as from `get_risk_rollup`, ordered by flood risk, then
+            by lexagraphic (dictionary) order on the group name.
+        """
+        table = self.get_risk_rollup(level)
+        order = np.lexsort((table.index.to_numpy(dtype=str), -table['Flood Risk'].to_numpy()))
+        return table.iloc[order]
+
+    def iter_results(self, chunksize=65536):
+        """Generate chunks of the band code, flood cost, annual flood risk and
+        risk rank of every postcode, in `dfp` order.
+
+        Chunks are read-only views of arrays computed once for all
+        postcodes, so that no data is copied.
+
+        Parameters
+        ----------
+
+        chunksize: int, optional
+            Number of postcodes in each chunk.
+
+        Returns
+        -------
+
+        generator of dicts
+            Dictionaries of arrays keyed as in
+            `flood_tool.export.RESULT_COLUMNS`, where `rank` is 0 for the
+            highest risk postcode, ties being ordered by postcode.
+        """
+        codes, cost, risk = self._all_scores()
+        columns = {'postcode': self._row_postcodes, 'band': codes, 'cost': cost,
+                   'risk': risk, 'rank': self._cached('rank', self._risk_rank)}
+        for start in range(0, len(codes), chunksize):
+            yield {name: column[start:start+chunksize] for name, column in columns.items()}
+
+    def _risk_rank(self):
+        """Get the rank of every `dfp` row by annual flood risk."""
+        _, _, risk = self._all_scores()
+        order = self._postcode_rows[np.argsort(-risk[self._postcode_rows], kind='stable')]
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        return _frozen(rank)
+
+    def export_results(self, path, format=None, chunksize=65536):
+        """Write the results of every postcode for bulk use.
+
+        Parameters
+        ----------
+
+        path: str
+            File (`.npz` or `.parquet`) or directory of `.npy` columns to
+            write. Read the results back with `flood_tool.export.read_results`.
+        format: str, optional
+            Format overriding the one implied by `path`, see
+            `flood_tool.export.write_results`.
+        chunksize: int, optional
+            Number of postcodes written at a time.
+        """
+        from .export import write_results
+
+        write_results(path, self.iter_results(chunksize), len(self._row_postcodes), format)
+
+    def build_tile_pyramid(self, path, cell=1000.0, levels=6, tile_size=256):
+        """Write tiles of the highest band and summed annual flood risk of
+        the postcodes in each OS grid cell, at several resolutions.
+
+        Parameters
+        ----------
+
+        path: str
+            Directory to write.
+        cell: float, optional
+            Cell size of the finest level, in metres.
+        levels: int, optional
+            Number of levels, each halving the resolution of the last.
+        tile_size: int, optional
+            Number of cells along each side of a tile.
+
+        Returns
+        -------
+
+        flood_tool.tiles.TilePyramid
+            The pyramid written.
+        """
+        from .tiles import build_pyramid
+
+        codes, _, risk = self._all_scores()
+        return build_pyramid(path, self._easting, self._northing, codes, risk,
+                             cell, levels, tile_size)
+
+    def classify_cascade(self, easting, northing):
+        """Get numerical risk codes of locations, testing the highest band first.
+
+        Locations are tested against the `High` band zones first, and only
+        those not yet resolved are tested against each lower band in turn.
+
+        Parameters
+        ----------
+
+        easting: numpy.ndarray of floats
+            OS Eastings of locations of interest
+        northing: numpy.ndarray of floats
+            OS Northings of locations of interest
+
+        Returns
+        -------
+
+        codes: numpy.ndarray of ints
+            Numerical risk code of the highest band zone containing each
+            location, or 0 (`Zero`) outside every zone.
+        resolved: dict
+            Number of locations resolved at each stage, keyed by band name.
+        """
+        easting = np.asarray(easting, dtype=np.float64)
+        northing = np.asarray(northing, dtype=np.float64)
+        codes = np.zeros(len(easting), dtype=np.int8)
+        todo = np.arange(len(easting))
+        resolved = {}
+
+        for code, index in self._zone_index.items():
+            hit = index.contains(easting[todo], northing[todo])
+            codes[todo[hit]] = code
+            resolved[str(BANDS[code])] = int(hit.sum())
+            todo = todo[~hit]
+        resolved['Zero'] = len(todo)
+
+        return codes, resolved
+
+    def save(self, filename, digests=None):
+        """Save the preprocessed postcode and flood risk data.
+
+        Parameters
+        ----------
+
+        filename : str
+            Name of the file to write.
+        digests : sequence of strs, optional
+            Digests of the input files (see `file_digest`), stored to be
+            checked by `Tool.load`.
+        """
+        with open(filename, 'wb') as cache:
+            pickle.dump({'version': TOOL_CACHE_VERSION,
+                         'digests': list(digests) if digests is not None else None,
+                         'state': {name: value for name, value in self.__dict__.items()
+                                   if name != '_cache_lock'}},
+                        cache, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename, digests=None):
+        """Create a `Tool` from data written by `Tool.save`.
+
+        This skips reading the .csv files and recomputing eastings and
+        northings, so is much quicker than building a new `Tool`.
+
+        Parameters
+        ----------
+
+        filename : str
+            Name of the file to read.
+        digests : sequence of strs, optional
+            Digests of the input files, which must match those saved.
+
+        Returns
+        -------
+
+        Tool
+            The restored tool.
+
+        Raises
+        ------
+
+        ValueError
+            If the file was written by another version of the `Tool`, or
+            from other input files.
+        """
+        with open(filename, 'rb') as cache:
+            try:
+                data = pickle.load(cache)
+            except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as err:
+                raise ValueError('%s: not a Tool cache (%s)'%(filename, err)) from err
+        if not isinstance(data, dict) or data.get('version') != TOOL_CACHE_VERSION:
+            raise ValueError('%s: not a version %d Tool cache'%(filename, TOOL_CACHE_VERSION))
+        if digests is not None and data['digests'] != list(digests):
+            raise ValueError('%s: built from different input files'%filename)
+
+        tool = cls.__new__(cls)
+        tool.__dict__.update(data['state'])
+        tool._cache_lock = threading.RLock()
+        for name, value in tool.__dict__.items():
+            if isinstance(value, np.ndarray):
+                setattr(tool, name, _frozen(value))
+            elif name in ('_group_names', '_group_codes'):
+                setattr(tool, name, {key: _frozen(array) for key, array in value.items()})
+        return tool
 
     def get_lat_long(self, postcodes):
         """Get an array of WGS84 (latitude, longitude) pairs from a list of postcodes.
@@ -56,13 +1031,258 @@ class Tool(object):
             Array of Nx2 (latitude, longitdue) pairs for the input postcodes.
             Invalid postcodes return [`numpy.nan`, `numpy.nan`].
         """
-        fp_data = self.dfp.loc[(self.dfp['Postcode'].isin(postcodes))]
-        fp_data = fp_data.set_index('Postcode')
-        fp_data = fp_data.reindex(index = postcodes)
-        fp_data = fp_data.reset_index()
+        rows = self._rows(postcodes)
+
+        return np.stack((self._take(self._latitude, rows), self._take(self._longitude, rows)), axis= -1)
+
+    def get_easting_northing(self, postcodes):
+        """Get an array of OS (easting, northing) pairs from a list of postcodes.
+
+        Parameters
+        ----------
+
+        postcodes: sequence of strs
+            Ordered sequence of N postcode strings
+
+        Returns
+        -------
+
+        ndarray
+            Array of Nx2 (easting, northing) pairs for the input postcodes.
+            Invalid postcodes return [`numpy.nan`, `numpy.nan`].
+        """
+        rows = self._rows(postcodes)
+
+        return np.stack((self._take(self._easting, rows), self._take(self._northing, rows)), axis= -1)
+
+
+    def get_postcode_scores(self, postcodes):
+        """Get flood probability band codes, flood costs and annual flood risks
+        from a sequence of postcodes.
+
+        Parameters
+        ----------
+
+        postcodes: sequence of strs
+            Ordered sequence of N postcode strings
+
+        Returns
+        -------
+
+        bands: numpy.ndarray of ints
+            Numerical risk codes (see `band_codes`). Invalid postcodes return -1.
+        cost: numpy.ndarray of floats
+            Flood costs. Invalid postcodes return `numpy.nan`.
+        risk: numpy.ndarray of floats
+            Annual flood risks. Invalid postcodes return `numpy.nan`.
+        """
+        return self._row_scores(self._rows(postcodes))
+
+    def _row_scores(self, rows):
+        """Get band codes, flood costs and annual flood risks for `dfp` rows."""
+        valid = rows >= 0
+
+        codes = np.full(len(rows), -1, dtype=np.int8)
+        codes[valid] = self._flood_codes(self._easting[rows[valid]],
+                                         self._northing[rows[valid]])
+        cost = self.flood_cost_from_rows(rows)
+        risk = self.annual_flood_risk_from_codes(rows, codes)
+
+        return codes, cost, risk
+
+    def _query_table(self, query, rows, locations=False):
+        """Tabulate the postcodes found by queries, with their latitudes and
+        longitudes if `locations` is set."""
+        codes, cost, risk = self._row_scores(rows)
+        table = {'Query': query, 'Postcode': self._row_postcodes[rows]}
+        if locations:
+            table['Latitude'] = self._latitude[rows]
+            table['Longitude'] = self._longitude[rows]
+        table.update({'Probability Band': BANDS[codes],
+                      'Flood Cost': cost,
+                      'Flood Risk': risk})
+        return pd.DataFrame(table).sort_values(['Query', 'Postcode'], ignore_index=True)
 
-        return np.stack((fp_data['Latitude'].values, fp_data['Longitude'].values), axis= -1)
+    def _ball_rows(self, easting, northing, radius):
+        """Get (query, row) pairs of postcodes within `radius` of points."""
+        easting, northing, radius = np.broadcast_arrays(np.atleast_1d(easting),
+                                                        np.atleast_1d(northing),
+                                                        np.atleast_1d(radius))
+        found = self._postcode_tree.query_ball_point(np.column_stack((easting, northing)),
+                                                     radius.astype(np.float64))
+        counts = np.fromiter((len(f) for f in found), dtype=np.intp, count=len(found))
+        query = np.repeat(np.arange(len(found)), counts)
+        rows = np.fromiter((row for f in found for row in f), dtype=np.intp,
+                           count=counts.sum())
+        return query, rows
 
+    def postcodes_within_radius(self, easting, northing, radius):
+        """Get the postcodes within a distance of one or more locations.
+
+        Parameters
+        ----------
+
+        easting: float or numpy.ndarray of floats
+            OS Eastings of query centres
+        northing: float or numpy.ndarray of floats
+            OS Northings of query centres
+        radius: float or numpy.ndarray of floats
+            Query radii, in metres.
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe with columns `Query` (the index of the query centre),
+            `Postcode`, `Probability Band`, `Flood Cost` and `Flood Risk`,
+            ordered by query then postcode.
+        """
+        return self._query_table(*self._ball_rows(easting, northing, radius))
+
+    def postcodes_in_bbox(self, easting_min, northing_min, easting_max, northing_max):
+        """Get the postcodes inside one or more bounding boxes.
+
+        Parameters
+        ----------
+
+        easting_min, northing_min: float or numpy.ndarray of floats
+            OS Easting and Northing of the lower left corner of each box
+        easting_max, northing_max: float or numpy.ndarray of floats
+            OS Easting and Northing of the upper right corner of each box
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe as from `postcodes_within_radius`, with `Query` the
+            index of the box.
+        """
+        easting_min, northing_min, easting_max, northing_max = [
+            np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in
+            np.broadcast_arrays(easting_min, northing_min, easting_max, northing_max)]
+        query, rows = self._ball_rows((easting_min+easting_max)/2,
+                                      (northing_min+northing_max)/2,
+                                      np.hypot(easting_max-easting_min,
+                                               northing_max-northing_min)/2)
+        inside = ((self._easting[rows] >= easting_min[query])
+                  & (self._easting[rows] <= easting_max[query])
+                  & (self._northing[rows] >= northing_min[query])
+                  & (self._northing[rows] <= northing_max[query]))
+        return self._query_table(query[inside], rows[inside])
+
+    def postcodes_in_zone(self, zones):
+        """Get the postcodes inside one or more flood zones.
+
+        Parameters
+        ----------
+
+        zones: int or sequence of ints
+            Row numbers of zones in the flood risk file.
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe as from `postcodes_within_radius`, with `Query` the
+            zone row number.
+        """
+        zones = np.atleast_1d(np.asarray(zones, dtype=np.intp))
+        query, rows = self._ball_rows(self._zone_x[zones], self._zone_y[zones],
+                                      np.sqrt(self._zone_r2[zones]))
+        return self._query_table(zones[query], rows)
+
+    def _key_rows(self, start, stop):
+        """Get (query, row) pairs of postcodes with `start <= key < stop`,
+        from `searchsorted` bounds in the sorted postcodes."""
+        lo = np.searchsorted(self._postcodes, start, side='left')
+        hi = np.maximum(np.searchsorted(self._postcodes, stop, side='left'), lo)
+        query = np.repeat(np.arange(len(lo)), hi-lo)
+        # positions lo..hi-1 of each query, without a python loop
+        offsets = np.arange(len(query)) - np.repeat(np.cumsum(hi-lo)-(hi-lo), hi-lo)
+        return query, self._postcode_rows[np.repeat(lo, hi-lo) + offsets]
+
+    def postcodes_with_prefix(self, prefixes):
+        """Get the postcodes starting with one or more partial postcodes.
+
+        Partial postcodes are normalized as by `normalize_prefixes`, then
+        looked up by binary search in the sorted postcodes, so that each
+        query takes O(log N + k) time for k matches.
+
+        Parameters
+        ----------
+
+        prefixes: str or sequence of strs
+            Partial postcodes, e.g. `'ME16'` or `'CT14 7'`.
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe with columns `Query` (the index of the prefix),
+            `Postcode`, `Latitude`, `Longitude`, `Probability Band`,
+            `Flood Cost` and `Flood Risk`, ordered by query then postcode.
+        """
+        prefixes = normalize_prefixes(np.atleast_1d(prefixes)).astype(self._postcodes.dtype)
+        return self._query_table(*self._key_rows(prefixes, _prefix_end(prefixes,
+                                                                       self._postcodes.dtype)),
+                                 locations=True)
+
+    def postcodes_in_range(self, first, last):
+        """Get the postcodes between two postcodes, inclusive, in
+        dictionary order of their normalized forms.
+
+        Parameters
+        ----------
+
+        first, last: str or sequence of strs
+            Ends of each range.
+
+        Returns
+        -------
+
+        pandas.DataFrame
+            Dataframe as from `postcodes_with_prefix`, with `Query` the
+            index of the range.
+        """
+        dtype = self._postcodes.dtype
+        first, last = np.broadcast_arrays(normalize_postcodes(np.atleast_1d(first)).astype(dtype),
+                                          normalize_postcodes(np.atleast_1d(last)).astype(dtype))
+        return self._query_table(*self._key_rows(first, _prefix_end(last, dtype)),
+                                 locations=True)
+
+    def suggest_postcodes(self, postcodes):
+        """Suggest the nearest valid postcode for each of a list of postcodes.
+
+        The suggestion is the neighbour in sorted order of the normalized
+        postcode sharing the longest prefix with it, preferring the
+        preceding postcode on ties. Valid postcodes are returned unchanged.
+
+        Parameters
+        ----------
+
+        postcodes: sequence of strs
+            Postcodes in any common format.
+
+        Returns
+        -------
+
+        numpy.ndarray of strs
+            Normalized valid postcodes.
+        """
+        postcodes = normalize_postcodes(postcodes).astype(self._postcodes.dtype)
+        idx = np.searchsorted(self._postcodes, postcodes)
+        before = self._postcodes[(idx-1).clip(0)]
+        after = self._postcodes[idx.clip(max=len(self._postcodes)-1)]
+
+        def common(a, b):
+            # length of the common prefix of pairs of strings
+            a = a.view(np.uint32).reshape(len(a), -1)
+            b = b.view(np.uint32).reshape(len(b), -1)
+            return np.cumprod(a == b, axis=1).sum(axis=1)
+
+        use_after = (idx == 0) | ((idx < len(self._postcodes))
+                                  & (common(postcodes, after) > common(postcodes, before)))
+        return np.where(use_after, after, before)
 
     def get_easting_northing_flood_probability(self, easting, northing):
         """Get an array of flood risk probabilities from arrays of eastings and northings.
@@ -85,21 +1305,7 @@ class Tool(object):
         numpy.ndarray of strs
             numpy array of flood probability bands corresponding to input locations.
         """
-        res = np.full((len(easting)), 'Zero')
-        c = pd.DataFrame(np.vstack((easting, northing)).T)
-        c[2] = res
-        probs = {4:'High', 3:'Medium', 2:'Low', 1:'Very Low', 0:'Zero'}
-        def get_probs(row):
-            dist = distance.cdist(np.vstack((row[0], row[1])).T, np.vstack((self.dff['X'], self.dff['Y'])).T)
-            circles = np.where(dist[0] <= self.dff['radius'], self.dff['Numerical Risk'], 0)
-            row[2] = probs[np.max(circles)]
-            return row
-        c = c.apply(get_probs, axis=1)
-
-        return c[2].to_numpy()
-
-
-
+        return BANDS[self._flood_codes(easting, northing)]
 
     def get_sorted_flood_probability(self, postcodes):
         """Get an array of flood risk probabilities from a sequence of postcodes.
@@ -122,18 +1328,15 @@ class Tool(object):
             data column is named `Probability Band`. Invalid postcodes and duplicates
             are removed.
         """
-        a = np.array(np.unique([s.replace(" ", "").upper() for s in postcodes]))
-        fp_data = self.dfp.loc[(self.dfp['Postcode'].str.replace(" ", "").isin (a))]
-        fp_data = fp_data.set_index('Postcode')
-        replace_data = self.get_easting_northing_flood_probability(fp_data['Easting'].to_numpy(), fp_data['Northing'].to_numpy())
-        fp_data['Probability Band'] = replace_data
-        fp_data['Probability Band'] = fp_data['Probability Band'].replace(['High', 'Medium', 'Low', 'Very Low', 'Zero'], [4, 3, 2, 1, 0])
-        updated = fp_data.sort_values(by = ['Probability Band', 'Postcode'],ascending = (False, True))
-        updated['Probability Band'] = updated['Probability Band'].replace([4, 3, 2, 1, 0], ['High', 'Medium', 'Low', 'Very Low', 'Zero'])
-        final = updated.drop(['Latitude', 'Longitude', 'Total Value', 'Easting', 'Northing'], axis=1)
-        print(final.index)
-        return final
+        postcodes = np.unique(normalize_postcodes(postcodes))
+        rows = self._rows(postcodes)
+        postcodes, rows = postcodes[rows >= 0], rows[rows >= 0]
+        codes = self._flood_codes(self._easting[rows], self._northing[rows])
 
+        order = np.lexsort((postcodes, -codes))
+        final = pd.DataFrame({'Probability Band': BANDS[codes[order]]},
+                             index=pd.Index(postcodes[order], name='Postcode'))
+        return final
 
     def get_flood_cost(self, postcodes):
         """Get an array of estimated cost of a flood event from a sequence of postcodes.
@@ -142,25 +1345,35 @@ class Tool(object):
 
         postcodes: sequence of strs
             Ordered collection of postcodes
-        probability_bands: sequence of strs
-            Ordered collection of flood probability bands
 
         Returns
         -------
        
         numpy.ndarray of floats
             array of floats for the pound sterling cost for the input postcodes.
-            Invalid postcodes return `numpy.nan`.
+            Postcodes not in the database return 0.
         """
+        rows = self._rows(normalize_postcodes(postcodes))
+        cost = self.flood_cost_from_rows(rows)
+        cost[rows < 0] = 0.0
+        return cost
+
+    def flood_cost_from_rows(self, rows):
+        """Get the flood costs of `dfp` rows.
+
+        Parameters
+        ----------
+
+        rows: numpy.ndarray of ints
+            Row positions in `dfp`, or -1 for invalid postcodes.
+
+        Returns
+        -------
 
-        a = postcodes
-        total_value_data = self.dfp.loc[(self.dfp['Postcode'].isin (a))]
-        total_value_data = total_value_data.set_index('Postcode')
-        total_value_data = total_value_data.reindex(index = a)
-        total_value_data = total_value_data.reset_index()
-        total_value_data = total_value_data.fillna(0)
-        cost_value = np.array(total_value_data['Total Value'])
-        return cost_value
+        numpy.ndarray of floats
+            Flood costs in pounds sterling, `numpy.nan` for invalid rows.
+        """
+        return self._take(self._value, np.asarray(rows, dtype=np.intp))
 
     def get_annual_flood_risk(self, postcodes, probability_bands):
         """Get an array of estimated annual flood risk in pounds sterling per year of a flood
@@ -179,15 +1392,36 @@ class Tool(object):
        
         numpy.ndarray
             array of floats for the annual flood risk in pounds sterling for the input postcodes.
-            Invalid postcodes return `numpy.nan`.
+            Postcodes not in the database return 0, and unknown bands `numpy.nan`.
         """
-        a = np.array(postcodes)
-        probs = {'Very Low':1/1000, 'Low':1/100, 'Medium':1/50, 'High':1/10, 'Zero':0}
+        rows = self._rows(normalize_postcodes(postcodes))
+        risk = self.annual_flood_risk_from_codes(rows, band_codes(probability_bands))
+        risk[rows < 0] = 0.0
+        return risk
+
+    def annual_flood_risk_from_codes(self, rows, codes):
+        """Get the annual flood risks of `dfp` rows in given bands.
+
+        Parameters
+        ----------
+
+        rows: numpy.ndarray of ints
+            Row positions in `dfp`, or -1 for invalid postcodes.
+        codes: numpy.ndarray of ints
+            Numerical risk codes of the bands, or -1 for unknown bands.
 
-        new_one = pd.DataFrame(np.vstack((a, probability_bands)).T) #pd.DataFrame(a, probability_bands)
-        new_one['probs_values'] = new_one[1].map(probs)
-        flrk = new_one['probs_values'] * self.get_flood_cost(postcodes) * 0.05
-        return flrk
+        Returns
+        -------
+
+        numpy.ndarray of floats
+            Annual flood risks in pounds sterling, `numpy.nan` for invalid
+            rows or unknown bands.
+        """
+        codes = np.asarray(codes)
+        risk = self.flood_cost_from_rows(rows)
+        risk *= np.where(codes >= 0, BAND_PROBABILITIES[codes.clip(0)], np.nan)
+        risk *= IMPACT_FACTOR
+        return risk
 
     def get_sorted_annual_flood_risk(self, postcodes):
         """Get a sorted pandas DataFrame of flood risks.
@@ -207,14 +1441,12 @@ class Tool(object):
             `Postcode` and the data column `Flood Risk`.
             Invalid postcodes and duplicates are removed.
         """
-        a = np.array(np.unique([s.replace(" ", "").replace(" ", "").upper() for s in postcodes]))
-        fp_data = self.dfp.loc[(self.dfp['Postcode'].str.replace(" ", "").isin (a))]
+        postcodes = np.unique(normalize_postcodes(postcodes))
+        rows = self._rows(postcodes)
+        postcodes, rows = postcodes[rows >= 0], rows[rows >= 0]
+        codes = self._flood_codes(self._easting[rows], self._northing[rows])
+        risk = self.annual_flood_risk_from_codes(rows, codes)
 
-        fp_data = fp_data.dropna()
-        fp_data = fp_data.set_index('Postcode')
-        probs = self.get_easting_northing_flood_probability(fp_data.loc[:, 'Easting'].to_numpy(), fp_data.loc[:, 'Northing'].to_numpy())
-        risk = self.get_annual_flood_risk(fp_data.index, probs)
-        fp_data.insert(5, "Flood Risk", risk.to_numpy(), True)
-        updated = fp_data.sort_values(by = ['Flood Risk','Postcode'],ascending = (False,True))
-        final = updated.drop(['Latitude', 'Longitude', 'Total Value', 'Easting', 'Northing'], axis=1)
-        return final
+        order = np.lexsort((postcodes, -risk))
+        return pd.DataFrame({'Flood Risk': risk[order]},
+                            index=pd.Index(postcodes[order], name='Postcode'))
@@ -0,0 +1,101 @@
+"""Accuracy report of reduced precision computation.
+
+Run with
+
+    python -m score.accuracy [-n 100000] [--dtype float32]
+
+to compare projections and zone classification in the reduced precision
+type with float64, on the scoring test data and on random locations,
+including locations within millimetres of zone edges.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import BASE_PATH
+
+__all__ = ['projection_accuracy', 'classification_accuracy']
+
+# Largest allowed projection error of the scoring tests, in metres
+
+TOLERANCE = 5.0
+
+def projection_accuracy(latitude, longitude, dtype=np.float32):
+    """Get the largest distance, in metres, between projections of GPS
+    locations in `dtype` and in float64."""
+    import flood_tool
+
+    exact = np.array(flood_tool.get_easting_northing_from_lat_long(latitude, longitude))
+    reduced = np.array(flood_tool.get_easting_northing_from_lat_long(latitude, longitude,
+                                                                     dtype=dtype),
+                       dtype=np.float64)
+    return float(np.hypot(*(reduced-exact)).max())
+
+def classification_accuracy(tool, size=100000, dtype=np.float32, seed=0):
+    """Count differences between zone classification in `dtype` and in
+    float64, for locations within 5 mm of the edges of random zones.
+
+    Returns
+    -------
+
+    int
+        Number of locations classified into different bands.
+    """
+    rng = np.random.default_rng(seed)
+    zones = rng.integers(0, len(tool.dff), size)
+    angle = rng.uniform(0, 2*np.pi, size)
+    distance = tool.dff['radius'].to_numpy()[zones] + rng.uniform(-0.005, 0.005, size)
+    easting = tool.dff['X'].to_numpy()[zones] + distance*np.cos(angle)
+    northing = tool.dff['Y'].to_numpy()[zones] + distance*np.sin(angle)
+
+    tool.cascade = False
+    try:
+        exact = tool.get_easting_northing_flood_probability(easting, northing)
+        tool.dtype = dtype
+        reduced = tool.get_easting_northing_flood_probability(easting, northing)
+    finally:
+        del tool.cascade
+        del tool.dtype
+
+    return int((reduced != exact).sum())
+
+def main(argv=None):
+    """Print the accuracy report for the scoring data files."""
+    import flood_tool
+
+    parser = argparse.ArgumentParser(prog='python -m score.accuracy')
+    parser.add_argument("-n", "--size", dest="size", type=int, default=100000,
+                        help="random locations tested")
+    parser.add_argument("--dtype", dest="dtype", default='float32')
+    parser.add_argument("-c", "--configfile", dest="configfile",
+                        default=os.sep.join((BASE_PATH, "data.json")))
+    args = parser.parse_args(argv)
+    dtype = np.dtype(args.dtype)
+
+    with open(args.configfile, "r") as _:
+        data = json.load(_)
+
+    testdb = pd.read_csv(os.sep.join([BASE_PATH]+data["test data"]))
+    headings = data['get_easting_northing_from_lat_long']['input headings']
+    error = projection_accuracy(*testdb[headings].to_numpy().T, dtype=dtype)
+    print("projection of test data: largest error %0.3f m (%s)"
+          %(error, ("fail", "pass")[error <= TOLERANCE]))
+
+    rng = np.random.default_rng(0)
+    error = projection_accuracy(rng.uniform(49.9, 60.9, args.size),
+                                rng.uniform(-8.6, 2.0, args.size), dtype)
+    print("projection of random locations: largest error %0.3f m (%s)"
+          %(error, ("fail", "pass")[error <= TOLERANCE]))
+
+    tool = flood_tool.Tool(os.sep.join([BASE_PATH]+data["postcode file"]),
+                           os.sep.join([BASE_PATH]+data["flood probability file"]),
+                           os.sep.join([BASE_PATH]+data["property value file"]))
+    changed = classification_accuracy(tool, args.size, dtype)
+    print("classification at zone edges: %d of %d bands changed (%s)"
+          %(changed, args.size, ("fail", "pass")[changed == 0]))
+
+if __name__ == '__main__':
+    main()
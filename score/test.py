@@ -42,11 +42,11 @@ def test_get_easting_northing_from_lat_long(data, testdb, flood_tool, record_pro
 
     output = np.array([[298169, 519487]])
     inputs = [54.560333], [-3.576252]
-    time, result = timing(flood_tool.get_easting_northing_from_lat_long,
-                          *inputs)
+    time, result, memory = measure(flood_tool.get_easting_northing_from_lat_long,
+                                   *inputs)
 
     matches = [r==approx(o, abs=tol) for r, o in zip(np.array([r.ravel() for r in result]).T, output)]
-    record_property('single_lookup', (time, matches))
+    record_property('single_lookup', (time, matches, memory))
 
     input_headings = data[name]['input headings']
     output_headings = data[name]['output headings']
@@ -56,11 +56,11 @@ def test_get_easting_northing_from_lat_long(data, testdb, flood_tool, record_pro
     args = list(testdb.iloc[idx1:idx2][input_headings].to_numpy().T)
     output = testdb.iloc[idx1:idx2][output_headings].to_numpy()
     
-    time, result = timing(flood_tool.get_easting_northing_from_lat_long, *args)
+    time, result, memory = measure(flood_tool.get_easting_northing_from_lat_long, *args)
 
     matches = [r == approx(np.array(o),
                            abs=tol) for r, o in zip(np.array(result).T,output)]
-    record_property('multiple_lookup', (time, matches))
+    record_property('multiple_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data[name]))
@@ -99,10 +99,10 @@ def test_get_lat_long(data, testdb, tool,
     rel = data['get_lat_long']['tolerance']
 
     output = np.array([[51.379129999999996, 1.3067440000000001]])
-    time, result = timing(tool.get_lat_long, ['CT7 9ET'])
+    time, result, memory = measure(tool.get_lat_long, ['CT7 9ET'])
     matches = [r==approx(o, rel=rel) for r, o in zip(result, output)]
     record_property('single_postcode_lookup',
-                    (time, matches))
+                    (time, matches, memory))
 
     input_headings = data['get_lat_long']['input headings']
     output_headings = data['get_lat_long']['output headings']
@@ -112,11 +112,11 @@ def test_get_lat_long(data, testdb, tool,
     args = list(testdb.iloc[idx1:idx2][input_headings].to_numpy().ravel())
     output = testdb.iloc[idx1:idx2][output_headings].to_numpy()
     
-    time, result = timing(tool.get_lat_long, args)
+    time, result, memory = measure(tool.get_lat_long, args)
 
     matches = [r == approx(np.array(o),
                            rel=rel) for r, o in zip(result,output)]
-    record_property('multiple_postcode_lookup', (time, matches))
+    record_property('multiple_postcode_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data['get_lat_long']))
@@ -130,11 +130,11 @@ def test_get_easting_northing_flood_probability(data, testdb, tool, record_prope
 
     output = ['Zero']
     inputs = [[298169], [519487]]
-    time, result = timing(getattr(tool, name),
-                          *inputs)
+    time, result, memory = measure(getattr(tool, name),
+                                   *inputs)
 
     matches = [r == o for r, o in zip(result, output)]
-    record_property('single_lookup', (time, matches))
+    record_property('single_lookup', (time, matches, memory))
 
     input_headings = data[name]['input headings']
     output_headings = data[name]['output headings']
@@ -144,10 +144,10 @@ def test_get_easting_northing_flood_probability(data, testdb, tool, record_prope
     args = list(testdb.iloc[idx1:idx2][input_headings].to_numpy().T)
     output = list(testdb.iloc[idx1:idx2][output_headings].to_numpy().ravel())
     
-    time, result = timing(getattr(tool, name), *args)
+    time, result, memory = measure(getattr(tool, name), *args)
 
     matches = [r == o for r, o in zip(result,output)]
-    record_property('multiple_lookup', (time, matches))
+    record_property('multiple_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data[name]))
@@ -168,14 +168,14 @@ def test_get_sorted_flood_probability(data, testdb, tool, record_property, recor
     output.drop_duplicates(subset='Postcode', inplace=True)
     output.set_index('Postcode', inplace=True)
     
-    time, result = timing(getattr(tool, name), args)
+    time, result, memory = measure(getattr(tool, name), args)
 
     assert result.index.name == 'Postcode'
 
     matches = list((result.index == output.index) &
                    (result['Probability Band'].to_numpy().ravel()
                     == output['Probability Band'].to_numpy().ravel()))
-    record_property('multiple_lookup', (time, matches))
+    record_property('multiple_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data[name]))
@@ -190,10 +190,10 @@ def test_get_flood_cost(data, testdb, tool,
     rel = data[name]['tolerance']
 
     output = np.array([4646599.42])
-    time, result = timing(getattr(tool, name), ['TN8 6AB'])
+    time, result, memory = measure(getattr(tool, name), ['TN8 6AB'])
     matches = [r==approx(o) for r, o in zip(result, output)]
     record_property('single_postcode_lookup',
-                    (time, matches))
+                    (time, matches, memory))
 
     input_headings = data[name]['input headings']
     output_headings = data[name]['output headings']
@@ -203,10 +203,10 @@ def test_get_flood_cost(data, testdb, tool,
     args = list(testdb.iloc[idx1:idx2][input_headings].to_numpy().T)
     output = list(testdb.iloc[idx1:idx2][output_headings].to_numpy().ravel())
     
-    time, result = timing(getattr(tool, name), *args)
+    time, result, memory = measure(getattr(tool, name), *args)
 
     matches = [r == approx(o, rel) for r, o in zip(result, output)]
-    record_property('multiple_postcode_lookup', (time, matches))
+    record_property('multiple_postcode_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data[name]))
@@ -220,10 +220,10 @@ def test_get_annual_flood_risk(data, testdb, tool,
     rel = data[name]['tolerance']
 
     output = np.array([193.506606])
-    time, result = timing(getattr(tool, name), ['DA1 5NU'], ['Very Low'])
+    time, result, memory = measure(getattr(tool, name), ['DA1 5NU'], ['Very Low'])
     matches = [r==approx(o) for r, o in zip(result, output)]
     record_property('single_postcode_lookup',
-                    (time, matches))
+                    (time, matches, memory))
 
     input_headings = data[name]['input headings']
     output_headings = data[name]['output headings']
@@ -233,10 +233,10 @@ def test_get_annual_flood_risk(data, testdb, tool,
     args = list(testdb.iloc[idx1:idx2][input_headings].to_numpy().T)
     output = testdb.iloc[idx1:idx2][output_headings].to_numpy().ravel()
     
-    time, result = timing(getattr(tool, name), *args)
+    time, result, memory = measure(getattr(tool, name), *args)
 
     matches = [r == approx(o, rel) for r, o in zip(result,output)]
-    record_property('multiple_postcode_lookup', (time, matches))
+    record_property('multiple_postcode_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data[name]))
@@ -259,7 +259,7 @@ def test_get_sorted_annual_flood_risk(data, testdb, tool,
     output.drop_duplicates(subset='Postcode', inplace=True)
     output.set_index('Postcode', inplace=True)
     
-    time, result = timing(getattr(tool, name), args)
+    time, result, memory = measure(getattr(tool, name), args)
 
     assert result.index.name == 'Postcode'
 
@@ -267,7 +267,7 @@ def test_get_sorted_annual_flood_risk(data, testdb, tool,
                    (result['Flood Risk'].to_numpy().ravel()
                     == approx(output['Flood Risk'].to_numpy().ravel(), rel)))
 
-    record_property('multiple_postcode_lookup', (time, matches))
+    record_property('multiple_postcode_lookup', (time, matches, memory))
 
     record_xml_attribute('points', calculate_score(time, matches,
                                                    data[name]))
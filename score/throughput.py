@@ -0,0 +1,105 @@
+"""Multi-threaded query throughput benchmark for a shared `Tool`.
+
+Run with
+
+    python -m score.throughput [-t 1 2 4 8] [-n 1000] [-d 5]
+
+to print queries per second for each thread count, all threads querying
+the same `Tool` instance.
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import BASE_PATH
+from .timing import timer
+
+__all__ = ['throughput']
+
+def throughput(func, args, threads, duration=5.0):
+    """Measure calls per second of `func(*args)` from a number of threads.
+
+    Parameters
+    ----------
+
+    func: callable
+        Query to run.
+    args: tuple
+        Arguments of each call.
+    threads: int
+        Number of threads calling `func` concurrently.
+    duration: float, optional
+        Seconds to run for.
+
+    Returns
+    -------
+
+    float
+        Completed calls per second, over all threads.
+    """
+    stop = threading.Event()
+
+    def worker():
+        calls = 0
+        while not stop.is_set():
+            func(*args)
+            calls += 1
+        return calls
+
+    with ThreadPoolExecutor(threads) as pool:
+        t0 = timer()
+        futures = [pool.submit(worker) for _ in range(threads)]
+        stop.wait(duration)
+        stop.set()
+        calls = sum(f.result() for f in futures)
+        elapsed = timer()-t0
+
+    return calls/elapsed
+
+def main(argv=None):
+    """Run the benchmark on the scoring data files."""
+    import flood_tool
+
+    parser = argparse.ArgumentParser(prog='python -m score.throughput')
+    parser.add_argument("-t", "--threads", dest="threads", type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    parser.add_argument("-n", "--size", dest="size", type=int, default=1000,
+                        help="postcodes per query")
+    parser.add_argument("-d", "--duration", dest="duration", type=float,
+                        default=5.0)
+    parser.add_argument("-c", "--configfile", dest="configfile",
+                        default=os.sep.join((BASE_PATH, "data.json")))
+    args = parser.parse_args(argv)
+
+    with open(args.configfile, "r") as _:
+        data = json.load(_)
+
+    tool = flood_tool.Tool(os.sep.join([BASE_PATH]+data["postcode file"]),
+                           os.sep.join([BASE_PATH]+data["flood probability file"]),
+                           os.sep.join([BASE_PATH]+data["property value file"]))
+
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(tool.dfp), args.size)
+    postcodes = tool.dfp['Postcode'].to_numpy()[rows]
+    easting = tool.dfp['Easting'].to_numpy()[rows]
+    northing = tool.dfp['Northing'].to_numpy()[rows]
+
+    queries = {'get_lat_long': (tool.get_lat_long, (postcodes,)),
+               'get_easting_northing_flood_probability':
+                   (tool.get_easting_northing_flood_probability, (easting, northing)),
+               'get_postcode_scores': (tool.get_postcode_scores, (postcodes,))}
+
+    for name, (func, func_args) in queries.items():
+        base = None
+        for threads in args.threads:
+            qps = throughput(func, func_args, threads, args.duration)
+            base = base or qps
+            print("%s: %d threads, %0.1f queries/s (x%0.2f)"%(name, threads,
+                                                              qps, qps/base))
+
+if __name__ == '__main__':
+    main()
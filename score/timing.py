@@ -7,18 +7,59 @@ import numpy as np
 
 from . import BASE_PATH
 
-__all__ = ['timing', 'calculate_score', 'process_results', 'timer']
-
-def timing(func, *args, repeat=5, **kwargs):
+__all__ = ['timing', 'measure', 'calculate_score', 'process_results', 'timer']
+
+def measure(func, *args, repeat=5, **kwargs):
+    """Time a call of `func(*args)` cold and warm, and measure its memory use.
+
+    The first call is timed on its own, as it may pay for one off work
+    such as caches being filled. It is followed by `repeat` timed warm
+    calls, then one call traced by `tracemalloc`.
+
+    Returns
+    -------
+
+    time: float
+        Fastest warm call, in seconds.
+    result:
+        Output of the last call.
+    memory: dict
+        `cold` time of the first call in seconds, `peak` bytes allocated
+        at once during the traced call and `retained` bytes still allocated
+        after it, including its result.
+    """
     import timeit
+    import tracemalloc
+
+    t0 = timer()
+    func(*args)
+    cold = timer()-t0
 
     tmp_globals = {'func':func, 'args':args}
 
     stmt = "out = func(*args)"
-    timer = timeit.Timer(stmt, globals=tmp_globals)
-    time = timer.repeat(repeat, number=1)
+    repeat_timer = timeit.Timer(stmt, globals=tmp_globals)
+    time = repeat_timer.repeat(repeat, number=1)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func(*args)
+    after, peak = tracemalloc.get_traced_memory()
+    if not tracing:
+        tracemalloc.stop()
+
+    return np.min(time), result, {'cold': cold,
+                                  'peak': peak-before,
+                                  'retained': after-before}
 
-    return np.min(time), func(*args)
+def timing(func, *args, repeat=5, **kwargs):
+    """Time the fastest of `repeat` calls of `func(*args)`, returning the
+    time and the output."""
+    time, result, _ = measure(func, *args, repeat=repeat, **kwargs)
+    return time, result
 
 def calculate_score(time, matches, test_data):
 
@@ -41,8 +82,8 @@ def time_weighting(t0,t1,t):
 def process_results(filename, outfile=None):
 
     def passed(ele):
-        p = 'failure' not in {_.tag for _ in ele.getchildren()}
-        p = p and 'error' not in {_.tag for _ in ele.getchildren()}
+        p = 'failure' not in {_.tag for _ in ele}
+        p = p and 'error' not in {_.tag for _ in ele}
 
         return p
 
@@ -98,8 +139,9 @@ def process_results(filename, outfile=None):
         for subname, val in children.items():
             jsubname = subname
             subname = subname.replace('_', ' ')
+            memory = None
             try:
-                t, result= eval(val)
+                t, result, *memory = eval(val)
             except:
                 print("\t%s: test error"%subname)
                 success = False
@@ -112,6 +154,11 @@ def process_results(filename, outfile=None):
                                                     len(result)))
                 if np.array(result).sum()/len(result)<0.5:
                     success = False
+            if memory:
+                save[name][jsubname].update(memory[0])
+                print("\t%s: cold %0.3e seconds, peak %d bytes, retained %d bytes"
+                      %(subname, memory[0]['cold'], memory[0]['peak'],
+                        memory[0]['retained']))
 
         if not success:
             effective_time = timeouts[name]
@@ -13,6 +13,7 @@ import requests
 import json
 from flood_tool import Tool
 from flood_tool import geo
+from flood_tool.live import WarningRules, WARNINGS
 from math import sqrt
 import numpy as np
 import csv
@@ -31,6 +32,7 @@ url = 'https://environment.data.gov.uk/flood-monitoring/id/stations?parameter=ra
 resp = requests.get(url)
 data = json.loads(resp.text)
 coord = data.get('items')
+rules = WarningRules()
 
 
 for i in range(3):
@@ -67,32 +69,5 @@ for i in range(3):
         station_value = station_data.get('items')[0].get('latestReading').get('value')
         print('Station', station_reference, ':', station_value, 'mm of rain.')
 
-        flood_risk = tool.get_annual_flood_risk(postcodes, tool.get_easting_northing_flood_probability(E_N[0], E_N[1]))
-        
-        risk = flood_risk[i]
-        if risk == 'Zero':
-            print('No Risk')
-        elif risk == 'Very Low':
-            if station_value < 3:
-                print('No Risk')
-            elif 3 < station_value:
-                print('Yellow Warning, Medium Risk')
-        elif risk == 'Low':
-            if station_value <= 2:
-                print('No Risk')
-            elif 2 < station_value < 3:
-                print('Yellow Warning, Medium Risk')
-            elif 3 <= station_value:
-                print('Yellow Waring, Medium Risk')
-        elif risk == 'Medium':
-            if station_value < 2:
-                print('No Risk')
-            elif 2 < station_value < 3:
-                print('Yellow Warning, Medium Risk')
-            elif 3 <= station_value:
-                print('Red Warning, High Risk')
-        elif risk == 'High':
-            if station_value < 2:
-                print('Yellow Warning, Medium Risk')
-            elif 2 <= station_value:
-                print('Red warning, High Risk')
+        band = tool.get_easting_northing_flood_probability(E_N[0, i:i+1], E_N[1, i:i+1])
+        print(WARNINGS[rules(band, [station_value])][0])
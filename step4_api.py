@@ -12,16 +12,16 @@ Inputs:
         If True, the easting_lim and northing_lim are input as lattitude and longitude.
 
 '''
-import requests
 import json
 # import tool
 from flood_tool import geo
-from math import sqrt
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 def historic_API(date, easting_lim, northing_lim, latlong=False):
+    import requests
+    import matplotlib.pyplot as plt
+
     url = 'https://environment.data.gov.uk/flood-monitoring/archive/readings-full-' + date + '.csv'
     data_csv = pd.read_csv(url)
     df=pd.DataFrame(data=data_csv)
@@ -152,4 +152,5 @@ def historic_API(date, easting_lim, northing_lim, latlong=False):
     
 
 
-historic_API('2019-01-03', 406689, 286822)
+if __name__ == '__main__':
+    historic_API('2019-01-03', 406689, 286822)